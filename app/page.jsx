@@ -1,13 +1,36 @@
 "use client"
 
-import { useState, useRef } from "react"
+import { useState, useRef, useEffect } from "react"
 import Header from "@/components/Header"
 import UrlInput from "@/components/UrlInput"
 import LoadingState from "@/components/LoadingState"
 import ResultsDisplay from "@/components/ResultsDisplay"
 import FeatureSection from "@/components/FeatureSection"
 import Footer from "@/components/Footer"
-import { analyzeProductReviews } from "@/services/api"
+import { streamProductAnalysis } from "@/services/api"
+
+// Map a progress event from the analysis stream to the result fields it fills in
+function partialResultsFromEvent(event, payload) {
+  switch (event) {
+    case "product":
+      return {
+        productName: payload.product.name,
+        productImage: payload.product.image_url,
+        productPrice: payload.product.price,
+        averageRating: payload.product.rating ?? "N/A",
+      }
+    case "reviews_page":
+      return { totalReviews: payload.totalReviews }
+    case "sentiment":
+      return { sentiment: payload.sentiment }
+    case "key_features":
+      return { keyFeatures: payload.keyFeatures }
+    case "summary":
+      return { summary: payload.summary }
+    default:
+      return null
+  }
+}
 
 export default function Home() {
   const [isLoading, setIsLoading] = useState(false)
@@ -15,8 +38,26 @@ export default function Home() {
   const [error, setError] = useState(null)
   const [loadingStep, setLoadingStep] = useState(0)
   const loadingRef = useRef(null)
+  // Bumped on every new analysis or cancel so events of an abandoned stream are ignored
+  const runRef = useRef(0)
+  // Aborts the open analysis stream, so a cancelled or replaced run stops downloading
+  const abortRef = useRef(null)
+
+  const abortStream = () => {
+    if (abortRef.current) {
+      abortRef.current.abort()
+      abortRef.current = null
+    }
+  }
+
+  // Close the stream when the page unmounts
+  useEffect(() => abortStream, [])
 
   const handleAnalyze = async (url) => {
+    const run = ++runRef.current
+    abortStream()
+    const controller = new AbortController()
+    abortRef.current = controller
     setIsLoading(true)
     setError(null)
     setResults(null)
@@ -33,19 +74,35 @@ export default function Home() {
       // Step 1: Scraping
       setLoadingStep(1)
 
-      // Step 2: AI Processing
-      setTimeout(() => setLoadingStep(2), 2000)
-
-      // Step 3: Generating Summary
-      setTimeout(() => setLoadingStep(3), 4000)
-
-      const data = await analyzeProductReviews(url)
-      setResults(data)
+      // Advance the steps and show each part of the results as the server reports it
+      const data = await streamProductAnalysis(url, (event, payload) => {
+        if (run !== runRef.current) return
+
+        if (event === "summarizing" || event === "sentiment" || event === "key_features") {
+          // Step 2: AI Processing
+          setLoadingStep(2)
+        } else if (event === "summary") {
+          // Step 3: Generating Summary
+          setLoadingStep(3)
+        }
+
+        const partial = partialResultsFromEvent(event, payload)
+        if (partial) {
+          setResults((current) => ({ ...current, ...partial }))
+        }
+      }, false, controller.signal)
+      if (run === runRef.current) setResults(data)
     } catch (err) {
-      setError(err.message || "Failed to analyze reviews. Please try again.")
+      if (run === runRef.current) {
+        setResults(null)
+        setError(err.message || "Failed to analyze reviews. Please try again.")
+      }
     } finally {
-      setIsLoading(false)
-      setLoadingStep(0)
+      if (run === runRef.current) {
+        abortRef.current = null
+        setIsLoading(false)
+        setLoadingStep(0)
+      }
     }
   }
 
@@ -62,6 +119,8 @@ export default function Home() {
             </p>
 
             <UrlInput onAnalyze={handleAnalyze} isLoading={isLoading} onCancel={() => {
+              runRef.current++
+              abortStream()
               setResults(null)
               setError(null)
               setIsLoading(false)
@@ -80,7 +139,7 @@ export default function Home() {
         <div ref={loadingRef} />
         {isLoading && <LoadingState currentStep={loadingStep} isLoading={isLoading} done={!!results || !!error} />}
 
-        {results && <ResultsDisplay results={results} />}
+        {results && <ResultsDisplay results={results} pending={isLoading} />}
 
         {!isLoading && !results && <FeatureSection />}
       </main>
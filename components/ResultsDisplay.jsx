@@ -1,6 +1,19 @@
 import { BarChart, Bar, XAxis, YAxis, Tooltip, ResponsiveContainer, Cell } from 'recharts';
 
-export default function ResultsDisplay({ results }) {
+function PendingNote({ text }) {
+  return (
+    <div className="pending-note">
+      <span className="pending-icon">⏳</span>
+      {text}
+    </div>
+  );
+}
+
+// While an analysis is still streaming (pending), sections whose data has not arrived show a placeholder
+export default function ResultsDisplay({ results, pending = false }) {
+  const hasSummary = !pending || !!results?.summary;
+  const hasSentiment = !pending || !!results?.sentiment;
+  const hasKeyFeatures = !pending || !!results?.keyFeatures;
   const {
     productName = "Unknown Product",
     productImage,
@@ -72,14 +85,18 @@ export default function ResultsDisplay({ results }) {
               <span className="title-icon">✅</span>
               Key Pros
             </h3>
-            <ul className="pros-list">
-              {summary.pros.map((pro, index) => (
-                <li key={index} className="pro-item">
-                  <span className="bullet-point pro-bullet">+</span>
-                  {pro}
-                </li>
-              ))}
-            </ul>
+            {hasSummary ? (
+              <ul className="pros-list">
+                {summary.pros.map((pro, index) => (
+                  <li key={index} className="pro-item">
+                    <span className="bullet-point pro-bullet">+</span>
+                    {pro}
+                  </li>
+                ))}
+              </ul>
+            ) : (
+              <PendingNote text="Summarizing reviews..." />
+            )}
           </div>
 
           <div className="summary-card cons-card">
@@ -87,14 +104,18 @@ export default function ResultsDisplay({ results }) {
               <span className="title-icon">⚠️</span>
               Key Cons
             </h3>
-            <ul className="cons-list">
-              {summary.cons.map((con, index) => (
-                <li key={index} className="con-item">
-                  <span className="bullet-point con-bullet">-</span>
-                  {con}
-                </li>
-              ))}
-            </ul>
+            {hasSummary ? (
+              <ul className="cons-list">
+                {summary.cons.map((con, index) => (
+                  <li key={index} className="con-item">
+                    <span className="bullet-point con-bullet">-</span>
+                    {con}
+                  </li>
+                ))}
+              </ul>
+            ) : (
+              <PendingNote text="Summarizing reviews..." />
+            )}
           </div>
 
           <div className="sentiment-card">
@@ -102,46 +123,52 @@ export default function ResultsDisplay({ results }) {
               <span className="title-icon">📊</span>
               Sentiment Analysis
             </h3>
-            <div className="sentiment-chart">
-              <div className="sentiment-bar">
-                <div className="sentiment-fill positive" style={{ width: `${sentiment.positive}%` }}></div>
-                <div className="sentiment-fill neutral" style={{ width: `${sentiment.neutral}%` }}></div>
-                <div className="sentiment-fill negative" style={{ width: `${sentiment.negative}%` }}></div>
-              </div>
-              <div className="sentiment-legend">
-                <div className="legend-item">
-                  <span className="legend-color positive"></span>
-                  <span>Positive ({sentiment.positive}%)</span>
-                </div>
-                <div className="legend-item">
-                  <span className="legend-color neutral"></span>
-                  <span>Neutral ({sentiment.neutral}%)</span>
+            {hasSentiment ? (
+              <>
+                <div className="sentiment-chart">
+                  <div className="sentiment-bar">
+                    <div className="sentiment-fill positive" style={{ width: `${sentiment.positive}%` }}></div>
+                    <div className="sentiment-fill neutral" style={{ width: `${sentiment.neutral}%` }}></div>
+                    <div className="sentiment-fill negative" style={{ width: `${sentiment.negative}%` }}></div>
+                  </div>
+                  <div className="sentiment-legend">
+                    <div className="legend-item">
+                      <span className="legend-color positive"></span>
+                      <span>Positive ({sentiment.positive}%)</span>
+                    </div>
+                    <div className="legend-item">
+                      <span className="legend-color neutral"></span>
+                      <span>Neutral ({sentiment.neutral}%)</span>
+                    </div>
+                    <div className="legend-item">
+                      <span className="legend-color negative"></span>
+                      <span>Negative ({sentiment.negative}%)</span>
+                    </div>
+                  </div>
                 </div>
-                <div className="legend-item">
-                  <span className="legend-color negative"></span>
-                  <span>Negative ({sentiment.negative}%)</span>
+                {/* Sentiment Bar Chart */}
+                <div style={{ width: '100%', height: 180, marginTop: 24 }}>
+                  <ResponsiveContainer>
+                    <BarChart data={[
+                      { name: 'Positive', value: sentiment.positive },
+                      { name: 'Neutral', value: sentiment.neutral },
+                      { name: 'Negative', value: sentiment.negative },
+                    ]}>
+                      <XAxis dataKey="name" stroke="#94a3b8" tick={{ fontSize: 14 }} />
+                      <YAxis stroke="#94a3b8" tick={{ fontSize: 14 }} domain={[0, 100]} />
+                      <Tooltip />
+                      <Bar dataKey="value">
+                        <Cell fill="#22c55e" />
+                        <Cell fill="#3b82f6" />
+                        <Cell fill="#ef4444" />
+                      </Bar>
+                    </BarChart>
+                  </ResponsiveContainer>
                 </div>
-              </div>
-            </div>
-            {/* Sentiment Bar Chart */}
-            <div style={{ width: '100%', height: 180, marginTop: 24 }}>
-              <ResponsiveContainer>
-                <BarChart data={[
-                  { name: 'Positive', value: sentiment.positive },
-                  { name: 'Neutral', value: sentiment.neutral },
-                  { name: 'Negative', value: sentiment.negative },
-                ]}>
-                  <XAxis dataKey="name" stroke="#94a3b8" tick={{ fontSize: 14 }} />
-                  <YAxis stroke="#94a3b8" tick={{ fontSize: 14 }} domain={[0, 100]} />
-                  <Tooltip />
-                  <Bar dataKey="value">
-                    <Cell fill="#22c55e" />
-                    <Cell fill="#3b82f6" />
-                    <Cell fill="#ef4444" />
-                  </Bar>
-                </BarChart>
-              </ResponsiveContainer>
-            </div>
+              </>
+            ) : (
+              <PendingNote text="Analyzing sentiment..." />
+            )}
           </div>
 
           <div className="features-card">
@@ -149,24 +176,28 @@ export default function ResultsDisplay({ results }) {
               <span className="title-icon">🏷️</span>
               Most Mentioned Features
             </h3>
-            <div className="features-list">
-              {keyFeatures.map((feature, index) => (
-                <div key={index} className="feature-item">
-                  <div className="feature-header">
-                    <span className="feature-name">{feature.feature}</span>
-                    <span className={`feature-sentiment ${feature.sentiment}`}>
-                      {feature.sentiment === "positive" ? "😊" : feature.sentiment === "negative" ? "😞" : "😐"}
-                    </span>
-                  </div>
-                  <div className="feature-mentions">
-                    <div className="mentions-bar">
-                      <div className="mentions-fill" style={{ width: `${feature.mentions}%` }}></div>
+            {hasKeyFeatures ? (
+              <div className="features-list">
+                {keyFeatures.map((feature, index) => (
+                  <div key={index} className="feature-item">
+                    <div className="feature-header">
+                      <span className="feature-name">{feature.feature}</span>
+                      <span className={`feature-sentiment ${feature.sentiment}`}>
+                        {feature.sentiment === "positive" ? "😊" : feature.sentiment === "negative" ? "😞" : "😐"}
+                      </span>
+                    </div>
+                    <div className="feature-mentions">
+                      <div className="mentions-bar">
+                        <div className="mentions-fill" style={{ width: `${feature.mentions}%` }}></div>
+                      </div>
+                      <span className="mentions-count">{feature.mentions} mentions</span>
                     </div>
-                    <span className="mentions-count">{feature.mentions} mentions</span>
                   </div>
-                </div>
-              ))}
-            </div>
+                ))}
+              </div>
+            ) : (
+              <PendingNote text="Finding key features..." />
+            )}
           </div>
         </div>
 
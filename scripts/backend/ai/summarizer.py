@@ -16,35 +16,90 @@ class ReviewSummarizer:
         else:
             logger.warning("Groq API key not found. Using fallback summarization.")
             self.groq_client = None
+        
+        # Enhanced feature keywords for better detection
+        self.feature_keywords = {
+            'battery': ['battery', 'charge', 'charging', 'power', 'backup'],
+            'camera': ['camera', 'photo', 'picture', 'selfie', 'video', 'lens'],
+            'display': ['display', 'screen', 'brightness', 'resolution', 'colors'],
+            'performance': ['performance', 'speed', 'fast', 'slow', 'lag', 'smooth'],
+            'design': ['design', 'look', 'appearance', 'style', 'color', 'beautiful'],
+            'build_quality': ['quality', 'build', 'material', 'construction', 'sturdy'],
+            'price': ['price', 'cost', 'value', 'money', 'expensive', 'cheap', 'affordable'],
+            'storage': ['storage', 'memory', 'space', 'gb', 'ram'],
+            'connectivity': ['network', '5g', '4g', 'wifi', 'bluetooth', 'signal'],
+            'user_interface': ['ui', 'interface', 'software', 'android', 'system']
+        }
+    
+    def summarize_reviews(self, reviews, product_name, progress_callback=None):
+        if not reviews:
+            return {'success': False, 'error': 'No reviews to summarize'}
+        
+        state = self.start_incremental_summary()
+        if not self.add_reviews(state, reviews):
+            return {'success': False, 'error': 'Failed to generate summary'}
+        
+        return self.finish_summary(state, product_name, progress_callback)
+    
+    def start_incremental_summary(self):
+        """Create the state used to analyze reviews page by page as they are scraped"""
+        return {
+            'review_texts': [],
+            'review_ratings': [],
+            'polarities': [],
+            'feature_mentions': Counter(),
+            'feature_sentiments': {}
+        }
     
-    def summarize_reviews(self, reviews, product_name):
+    def add_reviews(self, state, reviews):
+        """Run the per-review work (rating parsing, sentiment, feature counting) for a batch of reviews"""
         try:
-            if not reviews:
-                return {'success': False, 'error': 'No reviews to summarize'}
-            
-            # Prepare review texts
-            review_texts = [review['text'] for review in reviews]
-            review_ratings = []
             for review in reviews:
+                text = review['text']
                 try:
                     rating = review['rating']
                     if isinstance(rating, str):
                         rating = float(rating)
-                    review_ratings.append(rating)
                 except Exception:
-                    review_ratings.append(None)
+                    rating = None
+                
+                polarity = TextBlob(text).sentiment.polarity
+                
+                state['review_texts'].append(text)
+                state['review_ratings'].append(rating)
+                state['polarities'].append(polarity)
+                self.count_feature_mentions(text, polarity, state['feature_mentions'], state['feature_sentiments'])
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error in add_reviews: {str(e)}")
+            return False
+    
+    def finish_summary(self, state, product_name, progress_callback=None):
+        """Aggregate the accumulated reviews and generate pros and cons"""
+        try:
+            review_texts = state['review_texts']
+            review_ratings = state['review_ratings']
+            if not review_texts:
+                return {'success': False, 'error': 'No reviews to summarize'}
             
             # Generate sentiment analysis
-            sentiment = self.analyze_sentiment(review_texts, review_ratings)
+            sentiment = self.analyze_sentiment(review_texts, review_ratings, state['polarities'])
+            if progress_callback:
+                progress_callback('sentiment', {'sentiment': sentiment})
             
             # Extract key features
-            key_features = self.extract_key_features(review_texts)
+            key_features = self.rank_key_features(state['feature_mentions'], state['feature_sentiments'])
+            if progress_callback:
+                progress_callback('key_features', {'keyFeatures': key_features})
             
             # Generate pros and cons
             if self.groq_api_key:
                 pros_cons = self.generate_ai_summary(review_texts, product_name)
             else:
-                pros_cons = self.generate_fallback_summary(review_texts, review_ratings)
+                pros_cons = self.generate_fallback_summary(review_texts, review_ratings, state['polarities'])
+            if progress_callback:
+                progress_callback('summary', {'summary': {'pros': pros_cons['pros'], 'cons': pros_cons['cons']}})
             
             return {
                 'success': True,
@@ -188,7 +243,7 @@ class ReviewSummarizer:
             logger.info("Falling back to rule-based summary")
             return self.generate_fallback_summary(review_texts, [])
     
-    def generate_fallback_summary(self, review_texts, review_ratings):
+    def generate_fallback_summary(self, review_texts, review_ratings, polarities=None):
         """Generate summary without AI using text analysis"""
         try:
             # Analyze positive and negative reviews
@@ -201,8 +256,10 @@ class ReviewSummarizer:
                     rating = review_ratings[i]
                 else:
                     # Use sentiment analysis
-                    blob = TextBlob(text)
-                    sentiment_score = blob.sentiment.polarity
+                    if polarities is not None:
+                        sentiment_score = polarities[i]
+                    else:
+                        sentiment_score = TextBlob(text).sentiment.polarity
                     if sentiment_score > 0.1:
                         rating = 4
                     elif sentiment_score < -0.1:
@@ -327,14 +384,14 @@ class ReviewSummarizer:
         
         return themes
     
-    def analyze_sentiment(self, review_texts, review_ratings):
+    def analyze_sentiment(self, review_texts, review_ratings, polarities=None):
         try:
             if not review_ratings or all(rating is None for rating in review_ratings):
                 # Use TextBlob for sentiment analysis
+                if polarities is None:
+                    polarities = [TextBlob(text).sentiment.polarity for text in review_texts]
                 sentiments = []
-                for text in review_texts:
-                    blob = TextBlob(text)
-                    polarity = blob.sentiment.polarity
+                for polarity in polarities:
                     if polarity > 0.1:
                         sentiments.append('positive')
                     elif polarity < -0.1:
@@ -373,42 +430,36 @@ class ReviewSummarizer:
     
     def extract_key_features(self, review_texts):
         try:
-            # Enhanced feature keywords for better detection
-            feature_keywords = {
-                'battery': ['battery', 'charge', 'charging', 'power', 'backup'],
-                'camera': ['camera', 'photo', 'picture', 'selfie', 'video', 'lens'],
-                'display': ['display', 'screen', 'brightness', 'resolution', 'colors'],
-                'performance': ['performance', 'speed', 'fast', 'slow', 'lag', 'smooth'],
-                'design': ['design', 'look', 'appearance', 'style', 'color', 'beautiful'],
-                'build_quality': ['quality', 'build', 'material', 'construction', 'sturdy'],
-                'price': ['price', 'cost', 'value', 'money', 'expensive', 'cheap', 'affordable'],
-                'storage': ['storage', 'memory', 'space', 'gb', 'ram'],
-                'connectivity': ['network', '5g', '4g', 'wifi', 'bluetooth', 'signal'],
-                'user_interface': ['ui', 'interface', 'software', 'android', 'system']
-            }
-            
             feature_mentions = Counter()
             feature_sentiments = {}
             
             for review in review_texts:
-                review_lower = review.lower()
-                blob = TextBlob(review)
-                review_sentiment = 'positive' if blob.sentiment.polarity > 0.1 else 'negative' if blob.sentiment.polarity < -0.1 else 'neutral'
-                
-                for feature, keywords in feature_keywords.items():
-                    mentioned = False
-                    for keyword in keywords:
-                        if keyword in review_lower:
-                            feature_mentions[feature] += 1
-                            if feature not in feature_sentiments:
-                                feature_sentiments[feature] = []
-                            feature_sentiments[feature].append(review_sentiment)
-                            mentioned = True
-                            break
-                    
-                    if mentioned:
-                        continue
+                polarity = TextBlob(review).sentiment.polarity
+                self.count_feature_mentions(review, polarity, feature_mentions, feature_sentiments)
+            
+            return self.rank_key_features(feature_mentions, feature_sentiments)
             
+        except Exception as e:
+            logger.error(f"Error extracting key features: {str(e)}")
+            return []
+    
+    def count_feature_mentions(self, review, polarity, feature_mentions, feature_sentiments):
+        """Count which features one review mentions, along with the review's sentiment"""
+        review_lower = review.lower()
+        review_sentiment = 'positive' if polarity > 0.1 else 'negative' if polarity < -0.1 else 'neutral'
+        
+        for feature, keywords in self.feature_keywords.items():
+            for keyword in keywords:
+                if keyword in review_lower:
+                    feature_mentions[feature] += 1
+                    if feature not in feature_sentiments:
+                        feature_sentiments[feature] = []
+                    feature_sentiments[feature].append(review_sentiment)
+                    break
+    
+    def rank_key_features(self, feature_mentions, feature_sentiments):
+        """Turn feature mention counts into the top key features with their sentiment"""
+        try:
             # Get top features with their sentiment
             key_features = []
             for feature, count in feature_mentions.most_common(8):
@@ -430,4 +481,4 @@ class ReviewSummarizer:
             
         except Exception as e:
             logger.error(f"Error extracting key features: {str(e)}")
-            return []
\ No newline at end of file
+            return []
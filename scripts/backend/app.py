@@ -1,8 +1,11 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 from database.db import db
 from datetime import datetime, timezone
+from sqlalchemy import func, or_, and_
 import os
+import json
+import queue
 import logging
 
 # Handle .env file loading with better error handling
@@ -26,10 +29,20 @@ from scraper.universal_scraper import UniversalReviewScraper
 from scraper.flipkart_scraper import FlipkartScraper
 from scraper.amazon_scraper import AmazonScraper
 from ai.summarizer import ReviewSummarizer
-from database.models import db, Product, Review, Analysis
-from utils.universal_url_validator import UniversalURLValidator
+from database.models import db, Product, Review, Analysis, utcnow
+from database.bulk import upsert_product_reviews
+from database.migrations import run_migrations
+from database.engine import get_engine_options, read_session
+from utils.universal_url_validator import UniversalURLValidator, canonicalize_url
 from utils.rate_limiter import RateLimiter
 from utils.config_loader import config_loader
+from utils.job_manager import AnalysisJobManager
+from utils.async_engine import scrape_engine
+from utils.response_cache import response_cache
+from utils.single_flight import SingleFlight, AnalysisLeaseManager
+from utils.batch_runner import DomainFanOut
+from utils.pipeline import iter_in_background
+from concurrent.futures import ThreadPoolExecutor, wait
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -39,7 +52,14 @@ app = Flask(__name__)
 CORS(app)
 
 # Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///review_summarizer.db')
+database_url = os.getenv('DATABASE_URL', 'sqlite:///review_summarizer.db')
+app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = get_engine_options(database_url)
+
+# Optional read replica for history and analysis lookups
+replica_url = os.getenv('DATABASE_REPLICA_URL')
+if replica_url:
+    app.config['SQLALCHEMY_BINDS'] = {'replica': {'url': replica_url, **get_engine_options(replica_url)}}
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-here')
 
@@ -47,6 +67,33 @@ app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-here')
 db.init_app(app)
 rate_limiter = RateLimiter()
 
+# Bounded worker pool for asynchronous analyses
+settings = config_loader.get_settings()
+job_manager = AnalysisJobManager(
+    max_workers=settings.get('analysis_workers', 4),
+    max_pending=settings.get('max_pending_jobs', 50),
+    job_ttl=settings.get('job_ttl', 3600)
+)
+
+# Coalesce concurrent analyses of the same product, in-process and across workers
+single_flight = SingleFlight()
+lease_manager = AnalysisLeaseManager(
+    lease_ttl=settings.get('lease_ttl', 600),
+    wait_timeout=settings.get('lease_wait_timeout', 300)
+)
+
+# Per-scraper worker pools for batch analyses
+batch_fan_out = DomainFanOut(
+    concurrency_limits=settings.get('batch_concurrency', {}),
+    default_limit=2
+)
+
+# Batch URLs are validated in parallel; unknown domains cost a HEAD and a GET each
+batch_validation_executor = ThreadPoolExecutor(
+    max_workers=settings.get('batch_validation_workers', 16),
+    thread_name_prefix='batch-validate'
+)
+
 # Initialize scrapers and AI
 universal_scraper = UniversalReviewScraper()
 flipkart_scraper = FlipkartScraper()
@@ -57,58 +104,107 @@ url_validator = UniversalURLValidator()
 # Create database tables
 with app.app_context():
     db.create_all()
+    run_migrations()
 
-@app.route('/api/analyze', methods=['POST'])
-def analyze_reviews():
-    try:
-        # Rate limiting
-        client_ip = request.remote_addr
-        if not rate_limiter.allow_request(client_ip):
-            return jsonify({'error': 'Too many requests. Please wait before trying again.'}), 429
+def get_scraper_for_platform(platform):
+    """Choose the scraper to use for a platform"""
+    if platform == 'flipkart':
+        logger.info("Using specialized Flipkart scraper")
+        return flipkart_scraper
+    elif platform == 'amazon':
+        logger.info("Using specialized Amazon scraper")
+        return amazon_scraper
+    else:
+        logger.info(f"Using universal scraper for platform: {platform}")
+        return universal_scraper
 
-        data = request.get_json()
-        product_url = data.get('url')
+def get_cached_analysis(product, platform):
+    """Return the latest analysis of a product if it is inside the platform's freshness window"""
+    freshness_window = config_loader.get_freshness_window(platform)
+    if freshness_window <= 0 or not product.last_analyzed:
+        return None
 
-        if not product_url:
-            return jsonify({'error': 'Product URL is required'}), 400
+    last_analyzed = product.last_analyzed
+    if last_analyzed.tzinfo is None:
+        last_analyzed = last_analyzed.replace(tzinfo=timezone.utc)
 
-        # Validate URL
-        validation_result = url_validator.validate_url(product_url)
-        if not validation_result['valid']:
-            logger.error(f"URL validation failed for {product_url}: {validation_result['error']}")
-            return jsonify({'error': validation_result['error']}), 400
+    age = (datetime.now(timezone.utc) - last_analyzed).total_seconds()
+    if age > freshness_window:
+        return None
 
-        logger.info(f"URL validation successful. Platform: {validation_result['platform']}")
-        platform = validation_result['platform']
-        
+    return Analysis.query.filter_by(product_id=product.id).order_by(Analysis.created_at.desc()).first()
+
+def build_analysis_response(analysis, product):
+    """Build the API payload for a stored analysis"""
+    return {
+        'productName': product.name,
+        'productImage': product.image_url,
+        'productPrice': product.price,
+        'productRating': product.rating,
+        'platform': product.platform,
+        'totalReviews': analysis.total_reviews,
+        'summary': {
+            'pros': analysis.summary_pros,
+            'cons': analysis.summary_cons
+        },
+        'sentiment': {
+            'positive': analysis.sentiment_positive,
+            'neutral': analysis.sentiment_neutral,
+            'negative': analysis.sentiment_negative
+        },
+        'keyFeatures': analysis.key_features,
+        'analysisId': analysis.id,
+        'createdAt': analysis.created_at.isoformat()
+    }
+
+def build_stored_analysis_response(analysis, product):
+    """Build the payload for an analysis that is returned without running the pipeline"""
+    average_rating = db.session.query(func.avg(Review.rating)).filter(
+        Review.product_id == product.id,
+        Review.removed_at.is_(None)
+    ).scalar()
+    response_data = build_analysis_response(analysis, product)
+    response_data['averageRating'] = float(average_rating) if average_rating is not None else 0
+    response_data['cached'] = True
+    return response_data
+
+def run_analysis(product_url, platform, progress_callback=None):
+    """Scrape, persist and summarize a product. Must be called inside an app context."""
+    def report(stage, **details):
+        if progress_callback:
+            progress_callback(stage, details)
+
+    try:
         # Check if analysis already exists
         existing_product = Product.query.filter_by(url=product_url).first()
 
-        # Choose scraper based on platform
-        if platform == 'flipkart':
-            scraper = flipkart_scraper
-            logger.info("Using specialized Flipkart scraper")
-        elif platform == 'amazon':
-            scraper = amazon_scraper
-            logger.info("Using specialized Amazon scraper")
-        else:
-            scraper = universal_scraper
-            logger.info(f"Using universal scraper for platform: {platform}")
+        scraper = get_scraper_for_platform(platform)
 
-        # Scrape product and reviews
+        # Scrape product and reviews, analyzing each page of reviews while the next one loads
         logger.info(f"Starting scraping for URL: {product_url}")
-        scraping_result = scraper.scrape_product(product_url)
-        
-        if not scraping_result['success']:
-            return jsonify({'error': scraping_result['error']}), 400
+        report('scraping')
+        product_data = None
+        reviews_data = []
+        # Set when the scraper reports that it saw every review the product has
+        reviews_complete = False
+        summary_state = summarizer.start_incremental_summary()
+        summary_ok = True
 
-        product_data = scraping_result['product']
-        reviews_data = scraping_result['reviews']
+        for item in iter_in_background(scraper.iter_product(product_url, progress_callback=progress_callback)):
+            if item['type'] == 'error':
+                return {'success': False, 'error': item['error'], 'status_code': 400}
+            if item['type'] == 'product':
+                product_data = item['product']
+            elif item['type'] == 'reviews':
+                reviews_data.extend(item['reviews'])
+                reviews_complete = reviews_complete or item.get('complete', False)
+                summary_ok = summarizer.add_reviews(summary_state, item['reviews']) and summary_ok
 
         if len(reviews_data) == 0:
-            return jsonify({'error': 'No reviews found for this product'}), 400
+            return {'success': False, 'error': 'No reviews found for this product', 'status_code': 400}
 
         # Save or update product
+        report('saving', reviews=len(reviews_data))
         if existing_product:
             product = existing_product
             product.name = product_data['name']
@@ -130,26 +226,21 @@ def analyze_reviews():
         
         db.session.commit()
 
-        # Save reviews
-        Review.query.filter_by(product_id=product.id).delete()  # Clear old reviews
-        for review_data in reviews_data:
-            review = Review(
-                product_id=product.id,
-                text=review_data['text'],
-                rating=review_data['rating'],
-                author=review_data.get('author'),
-                date=review_data.get('date')
-            )
-            db.session.add(review)
-        
-        db.session.commit()
+        # Save reviews (insert new ones, mark missing ones as removed after a complete scrape, in one transaction)
+        upsert_result = upsert_product_reviews(product.id, reviews_data, batch_size=settings.get('review_insert_batch_size', 500),
+                                               complete=reviews_complete)
+        logger.info(f"Reviews saved: {len(upsert_result['new_fingerprints'])} new, {upsert_result['removed']} removed")
 
         # Generate AI summary
         logger.info("Generating AI summary")
-        summary_result = summarizer.summarize_reviews(reviews_data, product_data['name'])
+        report('summarizing', reviews=len(reviews_data))
+        if summary_ok:
+            summary_result = summarizer.finish_summary(summary_state, product_data['name'], progress_callback=progress_callback)
+        else:
+            summary_result = {'success': False, 'error': 'Failed to generate summary'}
         
         if not summary_result['success']:
-            return jsonify({'error': 'Failed to generate summary'}), 500
+            return {'success': False, 'error': 'Failed to generate summary', 'status_code': 500}
 
         # Save analysis
         analysis = Analysis(
@@ -181,17 +272,357 @@ def analyze_reviews():
             'sentiment': summary_result['sentiment'],
             'keyFeatures': summary_result['key_features'],
             'analysisId': analysis.id,
-            'createdAt': analysis.created_at.isoformat()
+            'createdAt': analysis.created_at.isoformat(),
+            'cached': False
         }
 
         logger.info(f"Analysis completed successfully for product: {product.name}")
-        return jsonify(response_data)
+        return {'success': True, 'data': response_data}
+
+    except Exception as e:
+        logger.error(f"Error in run_analysis: {str(e)}")
+        db.session.rollback()
+        return {'success': False, 'error': 'Internal server error occurred', 'status_code': 500}
+
+def run_leased_analysis(product_url, platform, lease_key, progress_callback=None):
+    """Run an analysis while holding the product's lease so other workers wait instead of duplicating it"""
+    wait_started = utcnow()
+    owner = lease_manager.acquire(lease_key)
+
+    if not owner:
+        logger.info(f"Another worker is analyzing {product_url}, waiting for its result")
+        if progress_callback:
+            progress_callback('waiting', {})
+        if not lease_manager.wait_for_release(lease_key):
+            logger.warning(f"Timed out waiting for another worker's analysis of {product_url}")
+
+        product = Product.query.filter_by(url=product_url).first()
+        if product:
+            recent_analysis = Analysis.query.filter(
+                Analysis.product_id == product.id,
+                Analysis.created_at >= wait_started
+            ).order_by(Analysis.created_at.desc()).first()
+            if recent_analysis:
+                return {'success': True, 'data': build_stored_analysis_response(recent_analysis, product)}
+
+        # The other worker failed or timed out, so run the analysis here, but never without the lease
+        owner = lease_manager.acquire(lease_key)
+        if not owner:
+            return {'success': False, 'error': 'This product is already being analyzed. Please try again shortly.', 'status_code': 409}
+
+    try:
+        return run_analysis(product_url, platform, progress_callback=progress_callback)
+    finally:
+        lease_manager.release(lease_key, owner)
+
+def analyze_product(product_url, platform, force_refresh=False, progress_callback=None):
+    """Return a fresh stored analysis or run one, sharing in-flight work for the same product.
+
+    Must be called inside an app context.
+    """
+    try:
+        # Reuse a recent analysis instead of scraping again
+        if not force_refresh:
+            existing_product = Product.query.filter_by(url=product_url).first()
+            cached_analysis = get_cached_analysis(existing_product, platform) if existing_product else None
+            if cached_analysis:
+                logger.info(f"Returning cached analysis {cached_analysis.id} for URL: {product_url}")
+                return {'success': True, 'data': build_stored_analysis_response(cached_analysis, existing_product)}
+    except Exception as e:
+        logger.error(f"Error checking cached analysis: {str(e)}")
+        db.session.rollback()
+
+    canonical_url = canonicalize_url(product_url)
+    lease_key = lease_manager.get_lease_key(canonical_url)
+    return single_flight.do(
+        canonical_url, run_leased_analysis, product_url, platform, lease_key,
+        progress_callback=progress_callback
+    )
+
+def run_analysis_in_context(product_url, platform, force_refresh=False, progress_callback=None):
+    """Run an analysis from a worker thread, outside of any request"""
+    with app.app_context():
+        return analyze_product(product_url, platform, force_refresh=force_refresh, progress_callback=progress_callback)
+
+def get_flag(data, name, default=False):
+    """Read a boolean option from the JSON body or the query string (e.g. ?async=1)"""
+    flag = data.get(name, request.args.get(name, default))
+    if isinstance(flag, str):
+        return flag.lower() in ('1', 'true', 'yes')
+    return bool(flag)
+
+@app.route('/api/analyze', methods=['POST'])
+def analyze_reviews():
+    try:
+        # Rate limiting
+        client_ip = request.remote_addr
+        if not rate_limiter.allow_request(client_ip):
+            return jsonify({'error': 'Too many requests. Please wait before trying again.'}), 429
+
+        data = request.get_json()
+        product_url = data.get('url')
+
+        if not product_url:
+            return jsonify({'error': 'Product URL is required'}), 400
+
+        # Validate URL
+        validation_result = url_validator.validate_url(product_url)
+        if not validation_result['valid']:
+            logger.error(f"URL validation failed for {product_url}: {validation_result['error']}")
+            return jsonify({'error': validation_result['error']}), 400
+
+        logger.info(f"URL validation successful. Platform: {validation_result['platform']}")
+        platform = validation_result['platform']
+        force_refresh = get_flag(data, 'force_refresh')
+
+        if get_flag(data, 'async'):
+            job_id = job_manager.submit(run_analysis_in_context, product_url, platform, force_refresh=force_refresh)
+            if not job_id:
+                return jsonify({'error': 'Analysis queue is full. Please try again later.'}), 503
+
+            logger.info(f"Queued analysis job {job_id} for URL: {product_url}")
+            response = jsonify({
+                'jobId': job_id,
+                'status': 'queued',
+                'statusUrl': f'/api/jobs/{job_id}'
+            })
+            response.headers['Location'] = f'/api/jobs/{job_id}'
+            return response, 202
+
+        result = analyze_product(product_url, platform, force_refresh=force_refresh)
+        if not result['success']:
+            return jsonify({'error': result['error']}), result['status_code']
+
+        return jsonify(result['data'])
 
     except Exception as e:
         logger.error(f"Error in analyze_reviews: {str(e)}")
         db.session.rollback()
         return jsonify({'error': 'Internal server error occurred'}), 500
 
+def format_sse(event, data):
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/api/analyze/stream', methods=['GET', 'POST'])
+def analyze_reviews_stream():
+    """Stream analysis progress as server-sent events, ending with a 'complete' or 'error' event"""
+    try:
+        # Rate limiting
+        client_ip = request.remote_addr
+        if not rate_limiter.allow_request(client_ip):
+            return jsonify({'error': 'Too many requests. Please wait before trying again.'}), 429
+
+        # EventSource clients can only send GET, so accept the URL as a query parameter too
+        data = request.get_json(silent=True) or request.args.to_dict()
+        product_url = data.get('url')
+
+        if not product_url:
+            return jsonify({'error': 'Product URL is required'}), 400
+
+        # Validate URL
+        validation_result = url_validator.validate_url(product_url)
+        if not validation_result['valid']:
+            logger.error(f"URL validation failed for {product_url}: {validation_result['error']}")
+            return jsonify({'error': validation_result['error']}), 400
+
+        platform = validation_result['platform']
+        force_refresh = get_flag(data, 'force_refresh')
+        events = queue.Queue()
+
+        def run_streamed_analysis(progress_callback=None):
+            def forward_progress(stage, details):
+                progress_callback(stage, details)
+                events.put((stage, details))
+
+            result = None
+            try:
+                result = run_analysis_in_context(product_url, platform, force_refresh=force_refresh,
+                                                 progress_callback=forward_progress)
+                return result
+            finally:
+                events.put(('done', result))
+
+        job_id = job_manager.submit(run_streamed_analysis)
+        if not job_id:
+            return jsonify({'error': 'Analysis queue is full. Please try again later.'}), 503
+
+        logger.info(f"Streaming analysis job {job_id} for URL: {product_url}")
+
+        def generate():
+            yield format_sse('validated', {'jobId': job_id, 'platform': platform})
+            while True:
+                try:
+                    stage, details = events.get(timeout=15)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                if stage != 'done':
+                    yield format_sse(stage, details)
+                elif details and details['success']:
+                    yield format_sse('complete', details['data'])
+                    break
+                else:
+                    error = details['error'] if details else 'Internal server error occurred'
+                    yield format_sse('error', {'error': error})
+                    break
+
+        response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+
+    except Exception as e:
+        logger.error(f"Error in analyze_reviews_stream: {str(e)}")
+        return jsonify({'error': 'Internal server error occurred'}), 500
+
+@app.route('/api/analyze/batch', methods=['POST'])
+def analyze_reviews_batch():
+    try:
+        # Rate limiting (a batch counts as a single request)
+        client_ip = request.remote_addr
+        if not rate_limiter.allow_request(client_ip):
+            return jsonify({'error': 'Too many requests. Please wait before trying again.'}), 429
+
+        data = request.get_json()
+        product_urls = data.get('urls')
+
+        if not product_urls or not isinstance(product_urls, list):
+            return jsonify({'error': 'A list of product URLs is required'}), 400
+
+        max_batch_size = settings.get('max_batch_size', 200)
+        if len(product_urls) > max_batch_size:
+            return jsonify({'error': f'Too many URLs. A batch can contain at most {max_batch_size} URLs.'}), 400
+
+        force_refresh = get_flag(data, 'force_refresh')
+        run_async = get_flag(data, 'async', default=True)
+
+        # Validate every URL and group them by scraper
+        results = [None] * len(product_urls)
+        string_indexes = []
+        for index, product_url in enumerate(product_urls):
+            if isinstance(product_url, str):
+                string_indexes.append(index)
+            else:
+                results[index] = {'url': product_url, 'status': 'rejected', 'error': 'URL must be a string'}
+
+        validation_results = batch_validation_executor.map(
+            url_validator.validate_url, [product_urls[index] for index in string_indexes]
+        )
+        validated_urls = []
+        for index, validation_result in zip(string_indexes, validation_results):
+            product_url = product_urls[index]
+            if not validation_result['valid']:
+                results[index] = {'url': product_url, 'status': 'rejected', 'error': validation_result['error']}
+                continue
+
+            platform = validation_result['platform']
+            website_config = config_loader.get_website_config(platform) or {}
+            validated_urls.append({
+                'index': index,
+                'url': product_url,
+                'platform': platform,
+                'group': website_config.get('scraper', 'universal')
+            })
+
+        logger.info(f"Batch of {len(product_urls)} URLs: {len(validated_urls)} valid")
+
+        # Fan out per scraper group, each with its own concurrency cap
+        futures = {}
+        for group, entries in batch_fan_out.group_urls(validated_urls).items():
+            for entry in entries:
+                if run_async:
+                    job_id = job_manager.submit_to(
+                        batch_fan_out.get_executor(group), run_analysis_in_context,
+                        entry['url'], entry['platform'], force_refresh=force_refresh
+                    )
+                    if job_id:
+                        results[entry['index']] = {
+                            'url': entry['url'],
+                            'platform': entry['platform'],
+                            'status': 'queued',
+                            'jobId': job_id,
+                            'statusUrl': f'/api/jobs/{job_id}'
+                        }
+                    else:
+                        results[entry['index']] = {
+                            'url': entry['url'],
+                            'platform': entry['platform'],
+                            'status': 'rejected',
+                            'error': 'Analysis queue is full. Please try again later.'
+                        }
+                else:
+                    future = batch_fan_out.submit(
+                        group, run_analysis_in_context,
+                        entry['url'], entry['platform'], force_refresh=force_refresh
+                    )
+                    futures[future] = entry
+
+        if futures:
+            wait(futures)
+            for future, entry in futures.items():
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Error in batch analysis for {entry['url']}: {str(e)}")
+                    result = {'success': False, 'error': 'Internal server error occurred'}
+
+                if result['success']:
+                    results[entry['index']] = {
+                        'url': entry['url'],
+                        'platform': entry['platform'],
+                        'status': 'completed',
+                        'result': result['data']
+                    }
+                else:
+                    results[entry['index']] = {
+                        'url': entry['url'],
+                        'platform': entry['platform'],
+                        'status': 'failed',
+                        'error': result['error']
+                    }
+
+        response_data = {
+            'results': results,
+            'total': len(product_urls),
+            'accepted': sum(1 for result in results if result['status'] != 'rejected'),
+            'rejected': sum(1 for result in results if result['status'] == 'rejected')
+        }
+        return jsonify(response_data), 202 if run_async else 200
+
+    except Exception as e:
+        logger.error(f"Error in analyze_reviews_batch: {str(e)}")
+        db.session.rollback()
+        return jsonify({'error': 'Internal server error occurred'}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    try:
+        job = job_manager.get_job(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+
+        response_data = {
+            'jobId': job['id'],
+            'status': job['status'],
+            'stage': job['stage'],
+            'progress': job['progress'],
+            'createdAt': datetime.fromtimestamp(job['created_at'], timezone.utc).isoformat(),
+            'updatedAt': datetime.fromtimestamp(job['updated_at'], timezone.utc).isoformat()
+        }
+        if job['status'] == 'completed':
+            response_data['result'] = job['result']
+        elif job['status'] == 'failed':
+            response_data['error'] = job['error']
+            response_data['statusCode'] = job['status_code']
+
+        return jsonify(response_data)
+
+    except Exception as e:
+        logger.error(f"Error in get_job_status: {str(e)}")
+        return jsonify({'error': 'Failed to fetch job status'}), 500
+
 @app.route('/api/supported-platforms', methods=['GET'])
 def get_supported_platforms():
     """Get list of supported platforms"""
@@ -205,28 +636,62 @@ def get_supported_platforms():
         logger.error(f"Error getting supported platforms: {str(e)}")
         return jsonify({'error': 'Failed to fetch supported platforms'}), 500
 
+def parse_history_cursor(cursor):
+    """Parse a '<created_at>,<id>' keyset cursor; returns None if it is malformed"""
+    try:
+        created_at, analysis_id = cursor.rsplit(',', 1)
+        return datetime.fromisoformat(created_at), int(analysis_id)
+    except (ValueError, AttributeError):
+        return None
+
 @app.route('/api/history', methods=['GET'])
 def get_analysis_history():
     try:
-        analyses = db.session.query(Analysis, Product).join(Product).order_by(Analysis.created_at.desc()).limit(20).all()
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        platform = request.args.get('platform')
+        before = request.args.get('before')
+
+        with read_session() as session:
+            query = session.query(Analysis, Product).join(Product)
+
+            if platform:
+                query = query.filter(Product.platform == platform)
+
+            # Keyset pagination: continue strictly after the last (created_at, id) seen
+            if before:
+                cursor = parse_history_cursor(before)
+                if not cursor:
+                    return jsonify({'error': 'Invalid cursor. Expected before=<created_at>,<id>'}), 400
+                cursor_created_at, cursor_id = cursor
+                query = query.filter(or_(
+                    Analysis.created_at < cursor_created_at,
+                    and_(Analysis.created_at == cursor_created_at, Analysis.id < cursor_id)
+                ))
+
+            analyses = query.order_by(Analysis.created_at.desc(), Analysis.id.desc()).limit(limit).all()
         
-        history = []
-        for analysis, product in analyses:
-            history.append({
-                'id': analysis.id,
-                'productName': product.name,
-                'productImage': product.image_url,
-                'platform': product.platform,
-                'totalReviews': analysis.total_reviews,
-                'createdAt': analysis.created_at.isoformat(),
-                'sentiment': {
-                    'positive': analysis.sentiment_positive,
-                    'neutral': analysis.sentiment_neutral,
-                    'negative': analysis.sentiment_negative
-                }
-            })
+            history = []
+            for analysis, product in analyses:
+                history.append({
+                    'id': analysis.id,
+                    'productName': product.name,
+                    'productImage': product.image_url,
+                    'platform': product.platform,
+                    'totalReviews': analysis.total_reviews,
+                    'createdAt': analysis.created_at.isoformat(),
+                    'sentiment': {
+                        'positive': analysis.sentiment_positive,
+                        'neutral': analysis.sentiment_neutral,
+                        'negative': analysis.sentiment_negative
+                    }
+                })
+
+            next_cursor = None
+            if len(analyses) == limit:
+                last_analysis = analyses[-1][0]
+                next_cursor = f"{last_analysis.created_at.isoformat()},{last_analysis.id}"
         
-        return jsonify({'history': history})
+        return jsonify({'history': history, 'nextCursor': next_cursor})
     
     except Exception as e:
         logger.error(f"Error in get_analysis_history: {str(e)}")
@@ -235,33 +700,18 @@ def get_analysis_history():
 @app.route('/api/analysis/<int:analysis_id>', methods=['GET'])
 def get_analysis_by_id(analysis_id):
     try:
-        analysis = db.session.query(Analysis, Product).join(Product).filter(Analysis.id == analysis_id).first()
-        
-        if not analysis:
-            return jsonify({'error': 'Analysis not found'}), 404
-        
-        analysis_obj, product = analysis
-        
-        response_data = {
-            'productName': product.name,
-            'productImage': product.image_url,
-            'productPrice': product.price,
-            'productRating': product.rating,
-            'platform': product.platform,
-            'totalReviews': analysis_obj.total_reviews,
-            'summary': {
-                'pros': analysis_obj.summary_pros,
-                'cons': analysis_obj.summary_cons
-            },
-            'sentiment': {
-                'positive': analysis_obj.sentiment_positive,
-                'neutral': analysis_obj.sentiment_neutral,
-                'negative': analysis_obj.sentiment_negative
-            },
-            'keyFeatures': analysis_obj.key_features,
-            'analysisId': analysis_obj.id,
-            'createdAt': analysis_obj.created_at.isoformat()
-        }
+        with read_session() as session:
+            analysis = session.query(Analysis, Product).join(Product).filter(Analysis.id == analysis_id).first()
+            
+            # The replica may lag behind an analysis that was just created
+            if not analysis and session is not db.session:
+                analysis = db.session.query(Analysis, Product).join(Product).filter(Analysis.id == analysis_id).first()
+            
+            if not analysis:
+                return jsonify({'error': 'Analysis not found'}), 404
+            
+            analysis_obj, product = analysis
+            response_data = build_analysis_response(analysis_obj, product)
         
         return jsonify(response_data)
     
@@ -279,7 +729,14 @@ def health_check():
             'AI-powered review detection',
             'Multi-platform support',
             'Intelligent content extraction'
-        ]
+        ],
+        'jobs': job_manager.get_stats(),
+        'fetches': scrape_engine.get_stats(),
+        'responseCache': response_cache.get_stats(),
+        'browsers': {
+            'universal': universal_scraper.drivers.get_stats(),
+            'flipkart': flipkart_scraper.drivers.get_stats()
+        }
     })
 
 if __name__ == '__main__':
@@ -0,0 +1,111 @@
+import hashlib
+import re
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from .models import db, Review, utcnow
+
+def review_fingerprint(review_data):
+    """Stable hash of a review's normalized text, author and date"""
+    text = re.sub(r'\s+', ' ', (review_data.get('text') or '')).strip().lower()
+    author = (review_data.get('author') or '').strip().lower()
+    date = (review_data.get('date') or '').strip().lower()
+    return hashlib.sha256('\x1f'.join([text, author, date]).encode('utf-8')).hexdigest()
+
+def build_review_rows(product_id, reviews_data):
+    """Turn scraped reviews into plain row dicts for a Core insert, dropping duplicates"""
+    now = utcnow()
+    rows = []
+    seen_fingerprints = set()
+    for review_data in reviews_data:
+        fingerprint = review_fingerprint(review_data)
+        if fingerprint in seen_fingerprints:
+            continue
+        seen_fingerprints.add(fingerprint)
+        rows.append({
+            'product_id': product_id,
+            'text': review_data['text'],
+            'rating': review_data['rating'],
+            'author': review_data.get('author'),
+            'date': review_data.get('date'),
+            'fingerprint': fingerprint,
+            'removed_at': None,
+            'created_at': now
+        })
+    return rows
+
+def insert_review_rows(rows, batch_size=500):
+    """Insert review rows in batches without building ORM objects, skipping fingerprints that already exist"""
+    if not rows:
+        return
+
+    review_table = Review.__table__
+    dialect = db.session.get_bind().dialect.name
+
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        if dialect == 'postgresql':
+            # One multi-row INSERT ... VALUES ... ON CONFLICT DO NOTHING per batch
+            statement = postgresql.insert(review_table).values(batch).on_conflict_do_nothing(
+                index_elements=['product_id', 'fingerprint']
+            )
+            db.session.execute(statement)
+        elif dialect == 'sqlite':
+            # executemany with a single prepared statement
+            statement = sqlite.insert(review_table).on_conflict_do_nothing(
+                index_elements=['product_id', 'fingerprint']
+            )
+            db.session.execute(statement, batch)
+        else:
+            db.session.execute(insert(review_table), batch)
+
+def upsert_product_reviews(product_id, reviews_data, batch_size=500, complete=False):
+    """Sync a product's stored reviews with a fresh scrape in a single transaction.
+
+    Only reviews with a new fingerprint are inserted, and stored reviews that come
+    back are un-marked. Stored reviews missing from the scrape are marked with
+    removed_at only when complete is true, i.e. the scrape saw every review the
+    product has; a scrape cut off at its review or page cap says nothing about the
+    reviews beyond it.
+    Returns the fingerprints of the newly inserted reviews and the number of removed reviews.
+    """
+    review_table = Review.__table__
+    try:
+        rows = build_review_rows(product_id, reviews_data)
+        scraped_fingerprints = {row['fingerprint'] for row in rows}
+
+        existing = db.session.execute(
+            db.select(review_table.c.id, review_table.c.fingerprint, review_table.c.removed_at)
+            .where(review_table.c.product_id == product_id)
+        ).all()
+
+        # Rows stored before fingerprints existed cannot be matched, so replace them
+        legacy_ids = [row.id for row in existing if row.fingerprint is None]
+        removed_ids = [row.id for row in existing
+                       if complete and row.fingerprint and row.removed_at is None
+                       and row.fingerprint not in scraped_fingerprints]
+        restored_ids = [row.id for row in existing
+                        if row.fingerprint and row.removed_at is not None and row.fingerprint in scraped_fingerprints]
+        existing_fingerprints = {row.fingerprint for row in existing if row.fingerprint}
+
+        if legacy_ids:
+            db.session.execute(review_table.delete().where(review_table.c.id.in_(legacy_ids)))
+        if removed_ids:
+            db.session.execute(
+                review_table.update().where(review_table.c.id.in_(removed_ids)).values(removed_at=utcnow())
+            )
+        if restored_ids:
+            db.session.execute(
+                review_table.update().where(review_table.c.id.in_(restored_ids)).values(removed_at=None)
+            )
+
+        new_rows = [row for row in rows if row['fingerprint'] not in existing_fingerprints]
+        insert_review_rows(new_rows, batch_size)
+        db.session.commit()
+
+        return {
+            'new_fingerprints': [row['fingerprint'] for row in new_rows],
+            'removed': len(removed_ids)
+        }
+    except Exception:
+        db.session.rollback()
+        raise
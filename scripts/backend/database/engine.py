@@ -0,0 +1,43 @@
+import os
+from contextlib import contextmanager
+from sqlalchemy.orm import Session
+from .models import db
+
+def get_env_bool(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes')
+
+def get_engine_options(database_url):
+    """Build SQLAlchemy engine options from DB_* environment variables"""
+    options = {
+        'pool_pre_ping': get_env_bool('DB_POOL_PRE_PING', True),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800))
+    }
+
+    # SQLite does not use a sized connection pool
+    if not database_url.startswith('sqlite'):
+        options['pool_size'] = int(os.getenv('DB_POOL_SIZE', 10))
+        options['max_overflow'] = int(os.getenv('DB_MAX_OVERFLOW', 20))
+        options['pool_timeout'] = int(os.getenv('DB_POOL_TIMEOUT', 30))
+
+    statement_timeout = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 0))
+    if statement_timeout and database_url.startswith('postgres'):
+        options['connect_args'] = {'options': f'-c statement_timeout={statement_timeout}'}
+
+    return options
+
+@contextmanager
+def read_session():
+    """Session for read-only queries, routed to the read replica when one is configured"""
+    replica_engine = db.engines.get('replica')
+    if replica_engine is None:
+        yield db.session
+        return
+
+    session = Session(bind=replica_engine)
+    try:
+        yield session
+    finally:
+        session.close()
@@ -0,0 +1,26 @@
+import logging
+from sqlalchemy import inspect, text
+from .models import db
+
+logger = logging.getLogger(__name__)
+
+def add_missing_columns(table_name, columns):
+    """Add columns that db.create_all() cannot add to an existing table"""
+    existing_columns = {column['name'] for column in inspect(db.engine).get_columns(table_name)}
+    for column_name, column_type in columns:
+        if column_name not in existing_columns:
+            logger.info(f"Adding column {table_name}.{column_name}")
+            with db.engine.begin() as connection:
+                connection.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}'))
+
+def run_migrations():
+    """Bring tables created by older versions up to date. Must be called inside an app context."""
+    add_missing_columns('reviews', [
+        ('fingerprint', 'VARCHAR(64)'),
+        ('removed_at', 'TIMESTAMP')
+    ])
+
+    # create_all() skips indexes of tables that already existed
+    for table in db.Model.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
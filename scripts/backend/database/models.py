@@ -1,9 +1,13 @@
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from datetime import datetime, timezone
 import json
 
 db = SQLAlchemy()
 
+def utcnow():
+    """Current UTC time as a naive datetime, the form the DateTime columns store and compare"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 class Product(db.Model):
     __tablename__ = 'products'
     
@@ -14,9 +18,13 @@ class Product(db.Model):
     price = db.Column(db.String(50))
     rating = db.Column(db.Float)
     platform = db.Column(db.String(50), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=utcnow)
     last_analyzed = db.Column(db.DateTime)
     
+    __table_args__ = (
+        db.Index('ix_products_platform', 'platform'),
+    )
+    
     # Relationships
     reviews = db.relationship('Review', backref='product', lazy=True, cascade='all, delete-orphan')
     analyses = db.relationship('Analysis', backref='product', lazy=True, cascade='all, delete-orphan')
@@ -43,7 +51,13 @@ class Review(db.Model):
     rating = db.Column(db.Integer)
     author = db.Column(db.String(100))
     date = db.Column(db.String(50))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    fingerprint = db.Column(db.String(64))  # sha256 of normalized text, author and date
+    removed_at = db.Column(db.DateTime)  # set when the review no longer appears on the product page
+    created_at = db.Column(db.DateTime, default=utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_reviews_product_fingerprint', 'product_id', 'fingerprint', unique=True),
+    )
     
     def to_dict(self):
         return {
@@ -53,6 +67,8 @@ class Review(db.Model):
             'rating': self.rating,
             'author': self.author,
             'date': self.date,
+            'fingerprint': self.fingerprint,
+            'removed_at': self.removed_at.isoformat() if self.removed_at else None,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
@@ -68,7 +84,12 @@ class Analysis(db.Model):
     sentiment_neutral = db.Column(db.Float)
     sentiment_negative = db.Column(db.Float)
     key_features = db.Column(db.JSON)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_analyses_created_at_id', 'created_at', 'id'),  # history ordering and keyset cursor
+        db.Index('ix_analyses_product_created_at', 'product_id', 'created_at'),
+    )
     
     def to_dict(self):
         return {
@@ -85,3 +106,11 @@ class Analysis(db.Model):
             'key_features': self.key_features,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+
+class AnalysisLease(db.Model):
+    __tablename__ = 'analysis_leases'
+    
+    key = db.Column(db.String(40), primary_key=True)  # sha1 of the canonical product URL
+    owner = db.Column(db.String(100), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, default=utcnow)
@@ -1,16 +1,16 @@
-import requests
-from bs4 import BeautifulSoup
-import time
+import httpx
 import random
 import logging
 from urllib.parse import urljoin, urlparse
 import re
+from utils.pipeline import collect_scraped_items
+from utils.html_parser import parse_html
+from utils.async_engine import scrape_engine
 
 logger = logging.getLogger(__name__)
 
 class AmazonScraper:
     def __init__(self):
-        self.session = requests.Session()
         self.user_agents = [
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -30,36 +30,44 @@ class AmazonScraper:
             'Sec-Fetch-Site': 'none',
         }
     
-    def scrape_product(self, url):
+    def scrape_product(self, url, progress_callback=None):
+        return collect_scraped_items(self.iter_product(url, progress_callback), url)
+    
+    def iter_product(self, url, progress_callback=None):
+        """Yield the product information first, then the reviews page by page"""
+        return scrape_engine.iterate(self.aiter_product(url, progress_callback))
+    
+    async def aiter_product(self, url, progress_callback=None):
+        """Async iter_product: fetches run on the engine loop, parsing and extraction on worker threads"""
         try:
             logger.info(f"Scraping Amazon product: {url}")
             
             # Get product page
-            response = self.session.get(url, headers=self.get_headers())
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
+            content = await scrape_engine.fetch(url, self.get_headers())
+            soup = await scrape_engine.to_thread(parse_html, content)
             
             # Extract product information
-            product_data = self.extract_product_info(soup, url)
+            product_data = await scrape_engine.to_thread(self.extract_product_info, soup, url)
             if not product_data:
-                return {'success': False, 'error': 'Could not extract product information'}
-            
-            # Get reviews
-            reviews_data = self.scrape_reviews(url, soup)
-            
-            return {
-                'success': True,
-                'product': product_data,
-                'reviews': reviews_data
-            }
+                yield {'type': 'error', 'error': 'Could not extract product information'}
+                return
             
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Request error while scraping Amazon: {str(e)}")
-            return {'success': False, 'error': 'Failed to fetch product page'}
+            yield {'type': 'error', 'error': 'Failed to fetch product page'}
+            return
         except Exception as e:
             logger.error(f"Error scraping Amazon product: {str(e)}")
-            return {'success': False, 'error': 'Failed to scrape product data'}
+            yield {'type': 'error', 'error': 'Failed to scrape product data'}
+            return
+        
+        if progress_callback:
+            progress_callback('product', {'product': product_data})
+        yield {'type': 'product', 'product': product_data}
+        
+        # Get reviews
+        async for page_reviews in self.aiter_reviews(url, soup, progress_callback):
+            yield {'type': 'reviews', 'reviews': page_reviews}
     
     def extract_product_info(self, soup, url):
         try:
@@ -144,8 +152,15 @@ class AmazonScraper:
             logger.error(f"Error extracting product info: {str(e)}")
             return None
     
-    def scrape_reviews(self, product_url, soup):
-        reviews = []
+    def scrape_reviews(self, product_url, soup, progress_callback=None):
+        return [review for page_reviews in self.iter_reviews(product_url, soup, progress_callback) for review in page_reviews]
+    
+    def iter_reviews(self, product_url, soup, progress_callback=None):
+        """Yield reviews page by page"""
+        return scrape_engine.iterate(self.aiter_reviews(product_url, soup, progress_callback))
+    
+    async def aiter_reviews(self, product_url, soup, progress_callback=None):
+        total_reviews = 0
         
         try:
             # Look for reviews on the same page first
@@ -155,20 +170,27 @@ class AmazonScraper:
                 # Try to find reviews link and navigate
                 reviews_link = self.find_reviews_link(soup, product_url)
                 if reviews_link:
-                    reviews = self.scrape_reviews_page(reviews_link)
+                    async for page_reviews in self.aiter_reviews_pages(reviews_link, progress_callback):
+                        total_reviews += len(page_reviews)
+                        yield page_reviews
             else:
-                reviews = self.extract_reviews_from_elements(review_elements)
+                reviews = await scrape_engine.to_thread(self.extract_reviews_from_elements, review_elements)
+                total_reviews += len(reviews)
+                if progress_callback:
+                    progress_callback('reviews_page', {'page': 1, 'reviews': len(reviews), 'totalReviews': total_reviews})
+                yield reviews
             
             # If still no reviews, try common review patterns
-            if not reviews:
-                reviews = self.scrape_fallback_reviews(soup)
+            if not total_reviews:
+                reviews = await scrape_engine.to_thread(self.scrape_fallback_reviews, soup)
+                total_reviews += len(reviews)
+                if reviews:
+                    yield reviews
             
-            logger.info(f"Scraped {len(reviews)} reviews from Amazon")
-            return reviews
+            logger.info(f"Scraped {total_reviews} reviews from Amazon")
             
         except Exception as e:
             logger.error(f"Error scraping reviews: {str(e)}")
-            return []
     
     def find_reviews_link(self, soup, base_url):
         try:
@@ -185,42 +207,47 @@ class AmazonScraper:
         except:
             return None
     
-    def scrape_reviews_page(self, reviews_url):
-        reviews = []
+    def scrape_reviews_page(self, reviews_url, progress_callback=None):
+        return [review for page_reviews in self.iter_reviews_pages(reviews_url, progress_callback) for review in page_reviews]
+    
+    def iter_reviews_pages(self, reviews_url, progress_callback=None):
+        """Yield the reviews of each reviews page as soon as it is parsed"""
+        return scrape_engine.iterate(self.aiter_reviews_pages(reviews_url, progress_callback))
+    
+    async def aiter_reviews_pages(self, reviews_url, progress_callback=None):
         try:
-            response = self.session.get(reviews_url, headers=self.get_headers())
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
+            content = await scrape_engine.fetch(reviews_url, self.get_headers())
+            soup = await scrape_engine.to_thread(parse_html, content)
             review_elements = soup.select('[data-hook="review"]')
             
-            reviews = self.extract_reviews_from_elements(review_elements)
+            reviews = await scrape_engine.to_thread(self.extract_reviews_from_elements, review_elements)
+            total_reviews = len(reviews)
+            if progress_callback:
+                progress_callback('reviews_page', {'page': 1, 'reviews': len(reviews), 'totalReviews': total_reviews})
+            yield reviews
             
             # Try to get more pages
             page_count = 0
-            while len(reviews) < 50 and page_count < 3:  # Limit to 3 additional pages
+            while total_reviews < 50 and page_count < 3:  # Limit to 3 additional pages
                 next_link = soup.select_one('li.a-last a')
                 if not next_link or not next_link.get('href'):
                     break
                 
-                time.sleep(random.uniform(2, 4))  # Rate limiting
-                
                 next_url = urljoin(reviews_url, next_link.get('href'))
-                response = self.session.get(next_url, headers=self.get_headers())
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
+                content = await scrape_engine.fetch(next_url, self.get_headers())
+                soup = await scrape_engine.to_thread(parse_html, content)
                 review_elements = soup.select('[data-hook="review"]')
                 
-                page_reviews = self.extract_reviews_from_elements(review_elements)
-                reviews.extend(page_reviews)
+                page_reviews = await scrape_engine.to_thread(self.extract_reviews_from_elements, review_elements)
+                total_reviews += len(page_reviews)
                 page_count += 1
-            
-            return reviews
+                
+                if progress_callback:
+                    progress_callback('reviews_page', {'page': page_count + 1, 'reviews': len(page_reviews), 'totalReviews': total_reviews})
+                yield page_reviews
             
         except Exception as e:
             logger.error(f"Error scraping reviews page: {str(e)}")
-            return []
     
     def extract_reviews_from_elements(self, review_elements):
         reviews = []
@@ -1,17 +1,16 @@
-import requests
-from bs4 import BeautifulSoup
-import time
 import random
 import logging
 import re
 from urllib.parse import urljoin, urlparse
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import json
+from utils.pipeline import collect_scraped_items
+from utils.html_parser import parse_html
+from utils.driver_pool import DriverPool, wait_until_ready
+from utils.host_scheduler import politeness
+from utils.async_engine import scrape_engine
 
 logger = logging.getLogger(__name__)
 
@@ -137,6 +136,10 @@ class FlipkartScraper:
                 '[data-testid="review-date"]'
             ]
         }
+        
+        # Warm browsers for the Selenium fallback; a page is ready once review blocks render
+        self.drivers = DriverPool(self.create_driver)
+        self.ready_selectors = self.selectors['review_blocks']
 
     def get_chrome_options(self):
         """Configure Chrome options for better stealth"""
@@ -156,6 +159,10 @@ class FlipkartScraper:
 
     def get_html_with_requests(self, url):
         """Try requests first (faster)"""
+        return scrape_engine.run(self.aget_html_with_requests(url))
+
+    async def aget_html_with_requests(self, url):
+        """Fetch and parse a page over HTTP, or None if that fails"""
         try:
             headers = {
                 'User-Agent': random.choice(self.user_agents),
@@ -166,55 +173,52 @@ class FlipkartScraper:
                 'Upgrade-Insecure-Requests': '1',
             }
             
-            session = requests.Session()
-            session.headers.update(headers)
-            
-            response = session.get(url, timeout=10)
-            response.raise_for_status()
-            
-            return BeautifulSoup(response.content, 'html.parser')
+            content = await scrape_engine.fetch(url, headers)
+            return await scrape_engine.to_thread(parse_html, content)
         except Exception as e:
             logger.warning(f"Requests failed: {e}")
             return None
 
+    def create_driver(self):
+        """Start a headless Chrome for the driver pool"""
+        driver = webdriver.Chrome(options=self.get_chrome_options())
+        # Stealth script, run before every page this browser loads
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+            'source': "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+        })
+        return driver
+
     def get_html_with_selenium(self, url):
         """Fallback to Selenium if requests fails"""
-        driver = None
         try:
-            options = self.get_chrome_options()
-            driver = webdriver.Chrome(options=options)
-            
-            # Execute stealth script
-            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            
-            driver.get(url)
-            
-            # Wait for content to load
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # Additional wait for dynamic content
-            time.sleep(random.uniform(3, 6))
-            
-            html = driver.page_source
-            return BeautifulSoup(html, 'html.parser')
+            # Wait for the host's turn before taking a browser, so none sits idle meanwhile
+            politeness.wait(url)
+            with self.drivers.lease() as driver:
+                # Pooled browsers live for many pages, so rotate the user agent per page
+                driver.execute_cdp_cmd('Network.setUserAgentOverride', {'userAgent': random.choice(self.user_agents)})
+                driver.get(url)
+                
+                # Wait until reviews render or the page stops loading resources
+                wait_until_ready(driver, self.ready_selectors, timeout=10)
+                
+                html = driver.page_source
+            return parse_html(html)
             
         except Exception as e:
             logger.error(f"Selenium failed: {e}")
             return None
-        finally:
-            if driver:
-                driver.quit()
 
     def get_html(self, url):
         """Try requests first, fallback to Selenium"""
-        soup = self.get_html_with_requests(url)
+        return scrape_engine.run(self.aget_html(url))
+
+    async def aget_html(self, url):
+        soup = await self.aget_html_with_requests(url)
         if soup:
             return soup
         
         logger.info("Falling back to Selenium...")
-        return self.get_html_with_selenium(url)
+        return await scrape_engine.to_browser_thread(self.get_html_with_selenium, url)
 
     def extract_with_selectors(self, soup, selectors, extract_type='text'):
         """Extract content using multiple selectors"""
@@ -446,9 +450,19 @@ class FlipkartScraper:
             logger.error(f"Error finding reviews link: {e}")
             return None
 
-    def scrape_product_reviews(self, base_url, max_pages=3):
+    def scrape_product_reviews(self, base_url, max_pages=3, progress_callback=None):
         """Scrape reviews with pagination"""
         reviews = []
+        for page_reviews in self.iter_product_reviews(base_url, max_pages, progress_callback):
+            reviews.extend(page_reviews)
+        return reviews
+
+    def iter_product_reviews(self, base_url, max_pages=3, progress_callback=None):
+        """Yield reviews page by page so they can be analyzed while later pages load"""
+        return scrape_engine.iterate(self.aiter_product_reviews(base_url, max_pages, progress_callback))
+
+    async def aiter_product_reviews(self, base_url, max_pages=3, progress_callback=None):
+        total_reviews = 0
         page = 1
         
         while page <= max_pages:
@@ -462,12 +476,12 @@ class FlipkartScraper:
                 
                 logger.info(f"Scraping reviews page {page}: {page_url}")
                 
-                soup = self.get_html(page_url)
+                soup = await self.aget_html(page_url)
                 if not soup:
                     logger.error(f"Failed to get HTML for page {page}")
                     break
                 
-                page_reviews = self.cus_rev(soup)
+                page_reviews = await scrape_engine.to_thread(self.cus_rev, soup)
                 
                 if not page_reviews:
                     logger.info(f"No reviews found on page {page}")
@@ -478,9 +492,13 @@ class FlipkartScraper:
                     else:
                         break
                 
-                reviews.extend(page_reviews)
+                total_reviews += len(page_reviews)
                 logger.info(f"Found {len(page_reviews)} reviews on page {page}")
                 
+                if progress_callback:
+                    progress_callback('reviews_page', {'page': page, 'reviews': len(page_reviews), 'totalReviews': total_reviews})
+                yield page_reviews
+                
                 # Check if there's a next page
                 next_page_exists = soup.find('a', {'aria-label': 'Next'}) or soup.find('span', text='Next')
                 if not next_page_exists and page > 1:
@@ -489,27 +507,38 @@ class FlipkartScraper:
                 
                 page += 1
                 
-                # Be respectful with delays
-                time.sleep(random.uniform(2, 4))
-                
             except Exception as e:
                 logger.error(f"Error scraping page {page}: {e}")
                 break
-        
-        return reviews
 
-    def scrape_product(self, url):
+    async def aiter_page_reviews(self, soup, progress_callback=None):
+        """Yield the reviews of an already loaded page as its only page"""
+        reviews_data = await scrape_engine.to_thread(self.cus_rev, soup)
+        if progress_callback:
+            progress_callback('reviews_page', {'page': 1, 'reviews': len(reviews_data), 'totalReviews': len(reviews_data)})
+        yield reviews_data
+
+    def scrape_product(self, url, progress_callback=None):
         """Main scraping method with better error handling"""
+        return collect_scraped_items(self.iter_product(url, progress_callback), url)
+
+    def iter_product(self, url, progress_callback=None):
+        """Yield the product information first, then the reviews page by page"""
+        return scrape_engine.iterate(self.aiter_product(url, progress_callback))
+
+    async def aiter_product(self, url, progress_callback=None):
+        """Async iter_product: fetches run on the engine loop, parsing and extraction on worker threads"""
         try:
             logger.info(f"Starting to scrape: {url}")
             
             # Get main product page
-            soup = self.get_html(url)
+            soup = await self.aget_html(url)
             if not soup:
-                return {'success': False, 'error': 'Failed to load product page'}
+                yield {'type': 'error', 'error': 'Failed to load product page'}
+                return
             
             # Extract product information (now with better fallback handling)
-            product_data = self.extract_product_info(soup, url)
+            product_data = await scrape_engine.to_thread(self.extract_product_info, soup, url)
             if not product_data or not product_data.get('name'):
                 logger.warning("No product data extracted, using fallback")
                 product_data = {
@@ -520,36 +549,37 @@ class FlipkartScraper:
                     'url': url
                 }
             
+            if progress_callback:
+                progress_callback('product', {'product': product_data})
+            yield {'type': 'product', 'product': product_data}
+            
             # Handle reviews
-            reviews_data = []
+            total_reviews = 0
             
             if '/product-reviews/' in url:
                 # Direct reviews page
-                reviews_data = self.scrape_product_reviews(url)
+                review_pages = self.aiter_product_reviews(url, progress_callback=progress_callback)
             else:
                 # Find reviews link
                 reviews_link = self.find_reviews_link(soup, url)
                 if reviews_link:
-                    reviews_data = self.scrape_product_reviews(reviews_link)
+                    review_pages = self.aiter_product_reviews(reviews_link, progress_callback=progress_callback)
                 else:
                     # Try to extract reviews from current page
-                    reviews_data = self.cus_rev(soup)
+                    review_pages = self.aiter_page_reviews(soup, progress_callback)
             
-            if not reviews_data:
-                logger.warning("No reviews found")
-                return {'success': False, 'error': 'No reviews found for this product'}
+            async for page_reviews in review_pages:
+                if page_reviews:
+                    total_reviews += len(page_reviews)
+                    yield {'type': 'reviews', 'reviews': page_reviews}
             
-            return {
-                'success': True,
-                'product': product_data,
-                'reviews': reviews_data,
-                'total_reviews': len(reviews_data),
-                'scraped_url': url
-            }
+            if not total_reviews:
+                logger.warning("No reviews found")
+                yield {'type': 'error', 'error': 'No reviews found for this product'}
             
         except Exception as e:
             logger.error(f"Error scraping product: {str(e)}")
-            return {'success': False, 'error': f'Scraping failed: {str(e)}'}
+            yield {'type': 'error', 'error': f'Scraping failed: {str(e)}'}
 
 # # Example usage
 # if __name__ == "__main__":
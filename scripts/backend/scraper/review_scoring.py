@@ -0,0 +1,454 @@
+import re
+from bisect import bisect_left
+from bs4.element import Tag, NavigableString, CData
+
+# Strings that Tag.get_text() includes for ordinary container tags
+TEXT_STRING_TYPES = (NavigableString, CData)
+
+WORD_RUN = re.compile(r'\w+')
+WORD_CHAR = re.compile(r'\w')
+
+# A text pattern we can evaluate per word: \b(word|word|...)\b
+WORD_ALTERNATION = re.compile(r'^\\b\((?:\w+\|)*\w+\)\\b$')
+
+RATING_PATTERN = r'\b[1-5]\s*(star|out of|/5)\b'
+# Same pattern without the word boundaries, as a lookahead so overlapping starts are all found
+RATING_CANDIDATES = re.compile(r'(?=([1-5]\s*(?:star|out of|/5)))', re.IGNORECASE)
+
+class PageText:
+    def __init__(self, soup, tag_names, matcher=None):
+        """Concatenated get_text(strip=True) of a page, plus the span of every element named in tag_names.
+
+        The tree is walked once, post-order: an element's span ends where its last
+        descendant's text ends, so every element's text is the slice text[start:end]
+        and nothing is copied per element.
+        """
+        self.matcher = matcher
+        self.spans = []
+        parts = []
+        length = 0
+
+        stack = [(soup, iter(soup.contents), None)]
+        while stack:
+            node, children, span = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                if span is not None:
+                    span[2] = length
+                continue
+            if isinstance(child, Tag):
+                child_span = None
+                if child.name in tag_names:
+                    # Appended on entry so spans stay in document order
+                    child_span = [child, length, None]
+                    self.spans.append(child_span)
+                stack.append((child, iter(child.contents), child_span))
+            elif type(child) in TEXT_STRING_TYPES:
+                text = child.strip()
+                if text:
+                    parts.append(text)
+                    length += len(text)
+
+        self.raw_text = ''.join(parts)
+        self.text = self.raw_text.lower()
+        # Slicing the lowered page only equals lowering the slice when lower() is length
+        # preserving and context free (final sigma is the one contextual rule)
+        self.sliceable = len(self.text) == len(self.raw_text) and 'Σ' not in self.raw_text
+
+        if self.sliceable and matcher:
+            self._index_words()
+            self._index_ratings()
+            self.phrase_positions = matcher.phrases.positions(self.text)
+
+    def _index_words(self):
+        # One entry per \w+ run; a text pattern only matches a whole run, so its
+        # hits are the run's weight and a slice's hits come from the prefix sums
+        self.word_starts = []
+        self.word_ends = []
+        self.word_hits = [0]
+        total = 0
+        for match in WORD_RUN.finditer(self.text):
+            self.word_starts.append(match.start())
+            self.word_ends.append(match.end())
+            total += self.matcher.word_weight(match.group())
+            self.word_hits.append(total)
+
+    def _index_ratings(self):
+        text = self.text
+        self.free_rating_starts = []
+        free_rating_ends = []
+        self.rating_by_start = {}
+        self.rating_by_end = {}
+        for match in RATING_CANDIDATES.finditer(text):
+            start, end = match.start(1), match.end(1)
+            left_free = start == 0 or not WORD_CHAR.match(text, start - 1)
+            right_free = end == len(text) or not WORD_CHAR.match(text, end)
+            if left_free and right_free:
+                self.free_rating_starts.append(start)
+                free_rating_ends.append(end)
+            self.rating_by_start[start] = (end, right_free)
+            self.rating_by_end.setdefault(end, []).append((start, left_free))
+
+        # Smallest end among the free candidates starting at or after each index
+        self.free_rating_min_end = free_rating_ends[:]
+        for i in range(len(free_rating_ends) - 2, -1, -1):
+            self.free_rating_min_end[i] = min(self.free_rating_min_end[i], self.free_rating_min_end[i + 1])
+
+    def raw_slice(self, start, end):
+        return self.raw_text[start:end]
+
+    def count_word_hits(self, start, end):
+        """Weighted text pattern hits in text[start:end], matching re.findall on the slice"""
+        first = bisect_left(self.word_starts, start)
+        last = bisect_left(self.word_starts, end)
+        hits = self.word_hits[last] - self.word_hits[first]
+
+        # A word cut by the end of the slice only counts as the part inside it
+        if last > first and self.word_ends[last - 1] > end:
+            word_start = self.word_starts[last - 1]
+            hits -= self.word_hits[last] - self.word_hits[last - 1]
+            hits += self.matcher.word_weight(self.text[word_start:end])
+
+        # Same for a word cut by the start of the slice
+        if first > 0 and self.word_ends[first - 1] > start:
+            hits += self.matcher.word_weight(self.text[start:min(self.word_ends[first - 1], end)])
+
+        return hits
+
+    def has_rating(self, start, end):
+        """Whether RATING_PATTERN matches somewhere in text[start:end]"""
+        i = bisect_left(self.free_rating_starts, start)
+        if i < len(self.free_rating_starts) and self.free_rating_min_end[i] <= end:
+            return True
+
+        # Word boundaries always hold at the edges of the slice itself
+        candidate = self.rating_by_start.get(start)
+        if candidate and candidate[0] <= end and (candidate[0] == end or candidate[1]):
+            return True
+        for candidate_start, left_free in self.rating_by_end.get(end, ()):
+            if candidate_start >= start and (candidate_start == start or left_free):
+                return True
+        return False
+
+    def count_phrases(self, start, end):
+        """Phrase hits in text[start:end], counting a phrase listed twice twice"""
+        count = 0
+        for index, positions in self.phrase_positions.items():
+            # Occurrences of one phrase all have the same length, so the first one
+            # starting inside the slice is the one most likely to end inside it
+            i = bisect_left(positions, start)
+            if i < len(positions) and positions[i] + self.matcher.phrases.lengths[index] <= end:
+                count += self.matcher.phrases.weights[index]
+        return count
+
+class LiteralScanner:
+    def __init__(self, literals, ignore_case=False):
+        """Find which of a list of literal strings occur in a text.
+
+        Case-sensitive literals are found with str.find, which beats any Python regex
+        alternation. Case-insensitive ones are compiled into a single lookahead
+        alternation, longest first, so overlapping occurrences are all seen; a literal
+        hidden by a longer one starting at the same position comes from a prefix table.
+        """
+        self.literals = list(dict.fromkeys(literals))
+        # A literal listed more than once scores once per listing
+        self.weights = [literals.count(literal) for literal in self.literals]
+        self.lengths = [len(literal) for literal in self.literals]
+        self.regex = None
+        if not ignore_case or not self.literals:
+            return
+
+        order = sorted(range(len(self.literals)), key=lambda i: len(self.literals[i]), reverse=True)
+        alternatives = '|'.join(f'(?P<l{i}>{re.escape(self.literals[i])})' for i in order)
+        self.regex = re.compile(f'(?=(?:{alternatives}))', re.IGNORECASE)
+        self.prefixes = []
+        for i, literal in enumerate(self.literals):
+            self.prefixes.append([
+                j for j, other in enumerate(self.literals)
+                if j != i and len(other) <= len(literal) and literal.lower().startswith(other.lower())
+            ])
+
+    def find(self, text):
+        """Indexes of the literals that occur in text"""
+        if self.regex is None:
+            return {i for i, literal in enumerate(self.literals) if literal in text}
+
+        found = set()
+        for match in self.regex.finditer(text):
+            index = int(match.lastgroup[1:])
+            found.add(index)
+            found.update(self.prefixes[index])
+        return found
+
+    def count(self, text):
+        """Weighted number of literals that occur in text"""
+        return sum(self.weights[index] for index in self.find(text))
+
+    def positions(self, text):
+        """Sorted start positions of each literal found in text, by literal index"""
+        positions = {}
+        if self.regex is None:
+            for index, literal in enumerate(self.literals):
+                position = text.find(literal)
+                while position != -1:
+                    positions.setdefault(index, []).append(position)
+                    position = text.find(literal, position + 1)
+            return positions
+
+        for match in self.regex.finditer(text):
+            index = int(match.lastgroup[1:])
+            position = match.start()
+            positions.setdefault(index, []).append(position)
+            for prefix in self.prefixes[index]:
+                positions.setdefault(prefix, []).append(position)
+        return positions
+
+def is_literal(pattern):
+    return not re.search(r'[.^$*+?{}\[\]\\|()]', pattern)
+
+class ReviewPatternMatcher:
+    def __init__(self, review_indicators, review_phrases):
+        """The review_indicators patterns and review phrases, compiled once for every score"""
+        self.text_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in review_indicators['text_patterns']]
+        self.class_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in review_indicators['class_patterns']]
+        self.id_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in review_indicators['id_patterns']]
+
+        # \b(a|b|c)\b patterns only ever match whole words, so they fold into one
+        # word -> weight table looked up once per word of the text
+        self.vocabulary = None
+        if all(WORD_ALTERNATION.match(pattern) for pattern in review_indicators['text_patterns']):
+            self.vocabulary = {}
+            for pattern in review_indicators['text_patterns']:
+                for word in set(pattern[3:-3].lower().split('|')):
+                    self.vocabulary[word] = self.vocabulary.get(word, 0) + 1
+            # Case-insensitive matching of non-ASCII text (e.g. the long s) goes through the regexes
+            self.ascii_vocabulary = all(word.isascii() for word in self.vocabulary)
+            self.words = re.compile(
+                r'\b(?:' + '|'.join(re.escape(word) for word in self.vocabulary) + r')\b', re.IGNORECASE
+            )
+        self.word_weights = {}
+
+        self.phrases = LiteralScanner(review_phrases)
+
+        self.class_scanner = None
+        if all(is_literal(pattern) for pattern in review_indicators['class_patterns']):
+            self.class_scanner = LiteralScanner(review_indicators['class_patterns'], ignore_case=True)
+        self.id_scanner = None
+        if all(is_literal(pattern) for pattern in review_indicators['id_patterns']):
+            self.id_scanner = LiteralScanner(review_indicators['id_patterns'], ignore_case=True)
+        self.class_scores = {}
+
+    def word_weight(self, word):
+        """How many text patterns a whole word matches"""
+        if self.ascii_vocabulary and word.isascii():
+            return self.vocabulary.get(word.lower(), 0)
+        weight = self.word_weights.get(word)
+        if weight is None:
+            weight = sum(1 for pattern in self.text_patterns if pattern.fullmatch(word))
+            self.word_weights[word] = weight
+        return weight
+
+    def count_words(self, text):
+        """Text pattern hits in text, as the sum of re.findall counts"""
+        if self.vocabulary is None:
+            return sum(len(pattern.findall(text)) for pattern in self.text_patterns)
+        return sum(self.word_weight(word) for word in self.words.findall(text))
+
+    def class_hits(self, class_name):
+        """Number of class patterns found in a class name"""
+        hits = self.class_scores.get(class_name)
+        if hits is None:
+            if self.class_scanner:
+                hits = self.class_scanner.count(class_name)
+            else:
+                hits = sum(1 for pattern in self.class_patterns if pattern.search(class_name))
+            self.class_scores[class_name] = hits
+        return hits
+
+    def id_hits(self, id_attr):
+        """Number of id patterns found in an id"""
+        if self.id_scanner:
+            return self.id_scanner.count(id_attr)
+        return sum(1 for pattern in self.id_patterns if pattern.search(id_attr))
+
+class ReviewScorer:
+    def __init__(self, review_indicators, review_phrases):
+        """Score DOM elements by how likely they are to be a review"""
+        self.matcher = ReviewPatternMatcher(review_indicators, review_phrases)
+        self.rating_pattern = re.compile(RATING_PATTERN, re.IGNORECASE)
+
+    def length_score(self, text_length):
+        """Score for text length, including the penalty for very short or very long texts"""
+        # Reviews are usually 20-2000 characters
+        score = 0
+        if 20 <= text_length <= 2000:
+            score += 10
+        elif 10 <= text_length <= 20:
+            score += 5
+        elif text_length > 2000:
+            score -= 5
+
+        if text_length < 10:
+            score -= 10
+        elif text_length > 3000:
+            score -= 5
+        return score
+
+    def attribute_score(self, element):
+        """Score for review-like class names and id"""
+        return self.class_id_score(element.get('class', []), element.get('id', ''))
+
+    def class_id_score(self, classes, id_attr):
+        score = 0
+        for class_name in classes:
+            score += self.matcher.class_hits(class_name) * 5
+        score += self.matcher.id_hits(id_attr) * 5
+        return score
+
+    def score_element(self, element):
+        """Score a single element from its own text"""
+        return self.score_text(element.get_text(strip=True), element.get('class', []), element.get('id', ''))
+
+    def score_text(self, text, classes=(), id_attr=''):
+        """Score an element given its get_text(strip=True) and its class and id attributes"""
+        text = text.lower()
+
+        score = self.length_score(len(text))
+        score += self.matcher.count_words(text) * 3
+        score += self.class_id_score(classes, id_attr)
+        if self.rating_pattern.search(text):
+            score += 8
+        score += self.matcher.phrases.count(text) * 4
+        return score
+
+    def score_page(self, soup, tag_names, min_score=None):
+        """Score every element named in tag_names with one walk of the tree.
+
+        Returns the PageText and a list of (element, score, start, end) in document
+        order, where page.raw_slice(start, end) is the element's get_text(strip=True).
+        With min_score, elements scoring lower are left out of the list.
+        """
+        # Per-word hit counting is only exact for whole-word patterns
+        matcher = self.matcher if self.matcher.vocabulary is not None else None
+        page = PageText(soup, tag_names, matcher)
+        scored = []
+
+        if not (page.sliceable and matcher):
+            for element, start, end in page.spans:
+                score = self.score_element(element)
+                if min_score is None or score >= min_score:
+                    scored.append((element, score, start, end))
+            return page, scored
+
+        for element, start, end in page.spans:
+            score = self.length_score(end - start)
+            score += page.count_word_hits(start, end) * 3
+            score += self.attribute_score(element)
+            if page.has_rating(start, end):
+                score += 8
+            score += page.count_phrases(start, end) * 4
+            if min_score is None or score >= min_score:
+                scored.append((element, score, start, end))
+
+        return page, scored
+
+# Tags that count as a repeated card even without a class
+CARD_TAGS = ('li', 'article', 'tr')
+
+def element_signature(element):
+    """Tag name plus class set, the shape shared by repeated review cards"""
+    return (element.name, frozenset(element.get('class', [])))
+
+def element_path(element):
+    """Tag names from the document root down to element"""
+    names = [parent.name for parent in element.parents if parent.parent is not None]
+    names.reverse()
+    names.append(element.name)
+    return names
+
+def find_by_signature(soup, path, classes):
+    """Elements with exactly this tag path and class set"""
+    class_set = frozenset(classes)
+    if classes:
+        elements = soup.find_all(path[-1], class_=classes[0])
+    else:
+        elements = soup.find_all(path[-1])
+    return [
+        element for element in elements
+        if frozenset(element.get('class', [])) == class_set and element_path(element) == path
+    ]
+
+class ReviewCardFinder:
+    def __init__(self, min_repeats=2):
+        """Group review candidates by the repeated sibling "card" they sit in.
+
+        A card is an element whose tag/class signature repeats under its parent.
+        When several ancestors repeat (a paragraph inside a review inside a list of
+        sections), the one with the most repeating siblings wins, the innermost on ties.
+        """
+        self.min_repeats = min_repeats
+        self.sibling_signatures = {}
+        self.cards = {}
+
+    def repeats(self, element):
+        """How many children of element's parent share its signature"""
+        parent = element.parent
+        signature = element_signature(element)
+        if parent is None or not (signature[1] or element.name in CARD_TAGS):
+            return 0
+
+        counts = self.sibling_signatures.get(id(parent))
+        if counts is None:
+            counts = {}
+            for child in parent.find_all(True, recursive=False):
+                child_signature = element_signature(child)
+                counts[child_signature] = counts.get(child_signature, 0) + 1
+            self.sibling_signatures[id(parent)] = counts
+        return counts.get(signature, 0)
+
+    def card_for(self, element):
+        """The card element sits in, or None"""
+        # Walk up to the first ancestor already resolved, then resolve the chain top-down
+        chain = []
+        node = element
+        while isinstance(node, Tag) and node.parent is not None and id(node) not in self.cards:
+            chain.append(node)
+            node = node.parent
+        best = self.cards.get(id(node), (None, 0))
+
+        for node in reversed(chain):
+            repeats = self.repeats(node)
+            if repeats >= self.min_repeats and repeats >= best[1]:
+                best = (node, repeats)
+            self.cards[id(node)] = best
+        return best[0]
+
+    def select(self, candidates):
+        """Keep the best-scoring candidate per card and drop candidates that wrap several cards.
+
+        candidates are (element, score, ...) tuples in document order; the result keeps that order.
+        """
+        cards = [self.card_for(candidate[0]) for candidate in candidates]
+
+        # Count the cards under every ancestor so list containers can be dropped
+        cards_below = {}
+        for card in {id(card): card for card in cards if card is not None}.values():
+            for ancestor in card.parents:
+                cards_below[id(ancestor)] = cards_below.get(id(ancestor), 0) + 1
+
+        kept = []
+        best_in_card = {}
+        for position, (candidate, card) in enumerate(zip(candidates, cards)):
+            if cards_below.get(id(candidate[0]), 0) >= 2:
+                continue
+            if card is None:
+                kept.append((position, candidate))
+                continue
+            best = best_in_card.get(id(card))
+            if best is None or candidate[1] > best[1][1]:
+                best_in_card[id(card)] = (position, candidate)
+
+        kept.extend(best_in_card.values())
+        kept.sort(key=lambda item: item[0])
+        return [candidate for position, candidate in kept]
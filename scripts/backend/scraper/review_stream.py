@@ -0,0 +1,133 @@
+import re
+from lxml import etree
+
+# Elements whose strings BeautifulSoup's get_text() leaves out
+SKIPPED_TEXT_TAGS = ('script', 'style', 'template')
+
+PRODUCT_ITEMTYPE = re.compile(r'schema\.org/Product\b', re.IGNORECASE)
+JSON_LD_PRODUCT = re.compile(r'"@type"\s*:\s*(?:\[[^\]]*)?"(?:https?://schema\.org/)?Product"')
+
+class StreamingReviewScanner:
+    def __init__(self, scorer, tag_names, max_reviews=50, threshold=15, encoding=None):
+        """Watch a page as it downloads and tell when enough of it has arrived.
+
+        Chunks are fed to lxml's incremental HTML parser. Each element named in
+        tag_names is scored as soon as it closes, and its innermost review-like
+        elements are counted. feed() returns True once the product header (an h1 or
+        schema.org Product markup) and max_reviews distinct reviews have been seen.
+        Elements are dropped from the lxml tree once they closed, so only the open
+        path and the text of its unfinished elements stay in memory.
+        """
+        self.scorer = scorer
+        self.tag_names = set(tag_names)
+        self.max_reviews = max_reviews
+        self.threshold = threshold
+        try:
+            self.parser = etree.HTMLPullParser(events=('start', 'end'), encoding=encoding)
+        except LookupError:
+            # A charset libxml2 does not know; let it detect one from the page instead
+            self.parser = etree.HTMLPullParser(events=('start', 'end'))
+        # One frame per open element: [element, text parts, own text read, contains a review]
+        self.stack = []
+        # Bytes after the last '<' of the data received so far
+        self.pending = b''
+        self.review_texts = set()
+        self.header_seen = False
+        self.done = False
+
+    @property
+    def review_count(self):
+        return len(self.review_texts)
+
+    def feed(self, chunk):
+        """Parse the next chunk of the response; True once reading can stop"""
+        if self.done:
+            return True
+        # libxml2's push parser can stall when a chunk ends inside text, so only whole
+        # tags and text runs are handed over; this also never splits a multi-byte character
+        data = self.pending + chunk
+        cut = data.rfind(b'<')
+        if cut <= 0:
+            self.pending = data
+            return False
+        self.pending = data[cut:]
+        self.parser.feed(data[:cut])
+        return self._read_events()
+
+    def close(self):
+        """Parse whatever is left once the response ended"""
+        if not self.done:
+            self.parser.feed(self.pending)
+            self.pending = b''
+            self.parser.close()
+            self._read_events()
+
+    def _read_events(self):
+        for event, element in self.parser.read_events():
+            if not isinstance(element.tag, str):
+                continue
+            if event == 'start':
+                self._start(element)
+            else:
+                self._end(element)
+            if self.header_seen and self.review_count >= self.max_reviews:
+                self.done = True
+                break
+        return self.done
+
+    def _consume_text(self, frame, open_child=None):
+        """Move the text that arrived in an element since the last call into its frame.
+
+        Everything before open_child (the child just started, if any) is complete: the
+        element's own text, then finished children (already counted) followed by their
+        tails. Finished children are removed from the tree once their tail was read.
+        """
+        element, parts = frame[0], frame[1]
+        if not frame[2]:
+            frame[2] = True
+            if element.text and element.tag not in SKIPPED_TEXT_TAGS:
+                parts.append(element.text.strip())
+        for child in list(element):
+            if child is open_child:
+                break
+            if child.tail:
+                parts.append(child.tail.strip())
+            element.remove(child)
+
+    def _start(self, element):
+        if self.stack:
+            self._consume_text(self.stack[-1], element)
+        self.stack.append([element, [], False, False])
+
+        if not self.header_seen and PRODUCT_ITEMTYPE.search(element.get('itemtype', '')):
+            self.header_seen = True
+
+    def _end(self, element):
+        if not self.stack or self.stack[-1][0] is not element:
+            # Recovered markup can close elements lxml never reported as opened
+            return
+        frame = self.stack[-1]
+        self._consume_text(frame)
+        self.stack.pop()
+        text = '' if element.tag in SKIPPED_TEXT_TAGS else ''.join(frame[1])
+        contains_review = frame[3]
+
+        if element.tag == 'h1' and text:
+            self.header_seen = True
+        elif element.tag == 'script' and not self.header_seen:
+            if 'ld+json' in element.get('type', '') and JSON_LD_PRODUCT.search(element.text or ''):
+                self.header_seen = True
+
+        # Only the innermost review-like element counts, not the containers around it
+        if not contains_review and element.tag in self.tag_names and len(text) > 20:
+            classes = element.get('class', '').split()
+            if self.scorer.score_text(text, classes, element.get('id', '')) >= self.threshold:
+                self.review_texts.add(text)
+                contains_review = True
+
+        if self.stack:
+            parent = self.stack[-1]
+            parent[1].append(text)
+            parent[3] = parent[3] or contains_review
+        # The tail is still needed by the parent
+        element.clear(keep_tail=True)
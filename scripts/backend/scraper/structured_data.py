@@ -0,0 +1,164 @@
+import json
+import logging
+import re
+from urllib.parse import urljoin
+
+logger = logging.getLogger(__name__)
+
+def _as_list(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+def _has_type(node, type_name):
+    return any(str(t).split('/')[-1] == type_name for t in _as_list(node.get('@type')))
+
+def _text(value):
+    """Plain string from a schema.org value that may be a string, a number or a {name} object"""
+    if isinstance(value, dict):
+        value = value.get('name') or value.get('@value')
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if value is None:
+        return None
+    value = re.sub(r'\s+', ' ', str(value)).strip()
+    return value or None
+
+def _number(value):
+    value = _text(value)
+    if value is None:
+        return None
+    match = re.search(r'\d+(?:[.,]\d+)?', value)
+    return float(match.group().replace(',', '.')) if match else None
+
+def _rating_out_of_5(rating):
+    """ratingValue of a Rating/AggregateRating scaled to a 0-5 scale"""
+    if not isinstance(rating, dict):
+        return _number(rating)
+    value = _number(rating.get('ratingValue'))
+    if value is None:
+        return None
+    best = _number(rating.get('bestRating')) or 5
+    if best != 5:
+        value = value * 5 / best
+    return round(min(5.0, value), 2)
+
+def _walk(node):
+    """Yield every dict in a JSON-LD document, including @graph members and nested values"""
+    if isinstance(node, list):
+        for item in node:
+            yield from _walk(item)
+    elif isinstance(node, dict):
+        yield node
+        for value in node.values():
+            if isinstance(value, (dict, list)):
+                yield from _walk(value)
+
+def find_json_ld_products(soup):
+    """schema.org Product objects embedded as JSON-LD"""
+    products = []
+    for script in soup.find_all('script', type=re.compile(r'application/ld\+json', re.I)):
+        raw = script.string or script.get_text()
+        if not raw or not raw.strip():
+            continue
+        try:
+            document = json.loads(raw)
+        except ValueError:
+            # Some sites leave trailing commas or several objects in one block
+            logger.debug("Skipping unparsable JSON-LD block")
+            continue
+        products.extend(node for node in _walk(document) if _has_type(node, 'Product'))
+    return products
+
+def _microdata_value(element):
+    for attribute in ('content', 'datetime', 'src', 'href'):
+        if element.get(attribute):
+            return element.get(attribute)
+    return element.get_text(' ', strip=True)
+
+def _microdata_item(scope):
+    """Turn an itemscope element into a dict of its own itemprops (nested items become dicts)"""
+    item = {'@type': scope.get('itemtype', '')}
+    for element in scope.find_all(attrs={'itemprop': True}):
+        # Only properties that belong to this scope, not to a nested item
+        owner = element.find_parent(attrs={'itemscope': True})
+        if owner is not scope:
+            continue
+        value = _microdata_item(element) if element.has_attr('itemscope') else _microdata_value(element)
+        for name in element['itemprop'].split():
+            if name in item:
+                item[name] = _as_list(item[name]) + [value]
+            else:
+                item[name] = value
+    return item
+
+def find_microdata_products(soup):
+    """schema.org Product items marked up with microdata"""
+    return [
+        _microdata_item(scope)
+        for scope in soup.find_all(attrs={'itemscope': True, 'itemtype': re.compile(r'schema\.org/Product\b', re.I)})
+    ]
+
+def _product_info(product, url):
+    image = product.get('image')
+    if isinstance(image, list):
+        image = image[0] if image else None
+    if isinstance(image, dict):
+        image = image.get('url') or image.get('contentUrl')
+    image_url = urljoin(url, image) if isinstance(image, str) and image else None
+
+    price = None
+    for offer in _as_list(product.get('offers')):
+        if isinstance(offer, dict):
+            price = offer.get('price') or offer.get('lowPrice')
+            if price is None and isinstance(offer.get('priceSpecification'), dict):
+                price = offer['priceSpecification'].get('price')
+        if price is not None:
+            break
+    price = _text(price)
+
+    return {
+        'name': _text(product.get('name')),
+        'image_url': image_url,
+        'price': price.replace(',', '') if price else None,
+        'rating': _rating_out_of_5(product.get('aggregateRating')),
+        'url': url
+    }
+
+def _reviews(product):
+    reviews = []
+    for review in _as_list(product.get('review')) + _as_list(product.get('reviews')):
+        if not isinstance(review, dict):
+            continue
+        text = _text(review.get('reviewBody')) or _text(review.get('description'))
+        if not text:
+            continue
+        title = _text(review.get('name')) or _text(review.get('headline'))
+        if title and not text.startswith(title):
+            text = f"{title}. {text}"
+        reviews.append({
+            'text': text,
+            'rating': _rating_out_of_5(review.get('reviewRating')),
+            'author': _text(review.get('author')) or 'Anonymous',
+            'date': _text(review.get('datePublished'))
+        })
+    return reviews
+
+def extract_structured_data(soup, url):
+    """Product info and reviews from schema.org JSON-LD or microdata.
+
+    Returns {'product': dict or None, 'reviews': [...]}; product fields that the page
+    does not provide are None. Review ratings are None when the markup has none.
+    """
+    try:
+        products = find_json_ld_products(soup) or find_microdata_products(soup)
+    except Exception as e:
+        logger.warning(f"Error reading structured data: {str(e)}")
+        products = []
+    if not products:
+        return {'product': None, 'reviews': []}
+
+    # Pages sometimes list related products too; the one with reviews (or a name) is the main one
+    products.sort(key=lambda p: (len(_reviews(p)) > 0, bool(p.get('name'))), reverse=True)
+    product = products[0]
+    return {'product': _product_info(product, url), 'reviews': _reviews(product)}
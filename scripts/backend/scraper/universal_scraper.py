@@ -1,23 +1,36 @@
-import requests
-from bs4 import BeautifulSoup
-import time
 import random
 import logging
 import re
 from urllib.parse import urljoin, urlparse
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import json
+import heapq
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from textblob import TextBlob
 from collections import Counter
-import difflib
+from utils.pipeline import collect_scraped_items
+from utils.html_parser import parse_html
+from utils.driver_pool import DriverPool, wait_until_ready
+from utils.host_scheduler import politeness
+from utils.async_engine import scrape_engine
+from utils.config_loader import config_loader
+from utils.layout_store import ReviewLayoutStore
+from utils.crawl_frontier import CrawlFrontier
+from utils.near_duplicates import NearDuplicateIndex
+from scraper.structured_data import extract_structured_data
+from scraper.review_stream import StreamingReviewScanner
+from scraper.review_scoring import ReviewScorer, ReviewCardFinder, element_path, find_by_signature
 
 logger = logging.getLogger(__name__)
 
+# A learned layout is only trusted if it still finds this many reviews, and at
+# least this share of the reviews it matched when it was learned
+MIN_LAYOUT_REVIEWS = 2
+LAYOUT_MATCH_RATIO = 0.5
+
 class UniversalReviewScraper:
     def __init__(self):
         self.user_agents = [
@@ -46,6 +59,27 @@ class UniversalReviewScraper:
             ]
         }
         
+        # Common review phrases
+        self.review_phrases = [
+            'i bought', 'purchased', 'received', 'delivery', 'shipping',
+            'would recommend', 'not recommend', 'satisfied', 'disappointed',
+            'good quality', 'poor quality', 'value for money', 'waste of money'
+        ]
+        
+        self.review_candidate_tags = ['div', 'p', 'span', 'article', 'section', 'li']
+        self.scorer = ReviewScorer(self.review_indicators, self.review_phrases)
+        self.max_reviews = 50
+        
+        # Stop downloading a page once its product header and enough reviews arrived
+        self.streaming_parse = config_loader.get_settings().get('streaming_parse', True)
+        
+        # Warm browsers for the Selenium fallback; a page is ready once something review-like renders
+        self.drivers = DriverPool(self.create_driver)
+        self.ready_selectors = ['[itemprop="review"]', '[data-hook="review"]', '[class*="review"]', '[id*="review"]']
+        
+        # Review container signatures learned per domain
+        self.layouts = ReviewLayoutStore(config_loader.get_settings().get('review_layout_store'))
+        
         # Common product info patterns
         self.product_patterns = {
             'title': [
@@ -83,8 +117,17 @@ class UniversalReviewScraper:
         options.add_experimental_option('useAutomationExtension', False)
         return options
 
-    def get_html_with_requests(self, url):
+    def get_html_with_requests(self, url, streaming=True):
         """Try requests first (faster)"""
+        return scrape_engine.run(self.aget_html_with_requests(url, streaming))
+
+    async def aget_html_with_requests(self, url, streaming=True):
+        """Fetch and parse a page over HTTP, or None if that fails"""
+        soup, _ = await self.aget_page_with_requests(url, streaming)
+        return soup
+
+    async def aget_page_with_requests(self, url, streaming=True):
+        """Fetch and parse a page over HTTP; returns (soup or None, whether reading stopped early)"""
         try:
             headers = {
                 'User-Agent': random.choice(self.user_agents),
@@ -95,155 +138,166 @@ class UniversalReviewScraper:
                 'Upgrade-Insecure-Requests': '1',
             }
             
-            session = requests.Session()
-            session.headers.update(headers)
-            
-            response = session.get(url, timeout=15)
-            response.raise_for_status()
-            
-            return BeautifulSoup(response.content, 'html.parser')
+            scanner = None
+            
+            def should_stop(chunk, response):
+                nonlocal scanner
+                if scanner is None:
+                    scanner = self.review_scanner(response)
+                return scanner.feed(chunk)
+            
+            content = await scrape_engine.fetch(url, headers, should_stop if streaming and self.streaming_parse else None)
+            if scanner is not None and scanner.done:
+                # Cut before the last tag so no tag or multi-byte character is split
+                cut = content.rfind(b'<')
+                if cut > 0:
+                    content = content[:cut]
+                logger.info(f"Stopped reading after {len(content)} bytes with {scanner.review_count} reviews")
+            soup = await scrape_engine.to_thread(parse_html, content)
+            return soup, scanner is not None and scanner.done
         except Exception as e:
             logger.warning(f"Requests failed: {e}")
-            return None
+            return None, False
+
+    def review_scanner(self, response):
+        """Scanner that stops a streamed page once it has enough reviews"""
+        # Only the charset the server declared is passed on; otherwise lxml reads the meta tag
+        return StreamingReviewScanner(self.scorer, self.review_candidate_tags, self.max_reviews, encoding=response.charset_encoding)
+
+    def create_driver(self):
+        """Start a headless Chrome for the driver pool"""
+        driver = webdriver.Chrome(options=self.get_chrome_options())
+        # Stealth script, run before every page this browser loads
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+            'source': "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+        })
+        return driver
 
     def get_html_with_selenium(self, url):
         """Fallback to Selenium if requests fails"""
-        driver = None
         try:
-            options = self.get_chrome_options()
-            driver = webdriver.Chrome(options=options)
-            
-            # Execute stealth script
-            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            
-            driver.get(url)
-            
-            # Wait for content to load
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # Additional wait for dynamic content
-            time.sleep(random.uniform(3, 6))
-            
-            html = driver.page_source
-            return BeautifulSoup(html, 'html.parser')
+            # Wait for the host's turn before taking a browser, so none sits idle meanwhile
+            politeness.wait(url)
+            with self.drivers.lease() as driver:
+                # Pooled browsers live for many pages, so rotate the user agent per page
+                driver.execute_cdp_cmd('Network.setUserAgentOverride', {'userAgent': random.choice(self.user_agents)})
+                driver.get(url)
+                
+                # Wait until reviews render or the page stops loading resources
+                wait_until_ready(driver, self.ready_selectors, timeout=15)
+                
+                html = driver.page_source
+            return parse_html(html)
             
         except Exception as e:
             logger.error(f"Selenium failed: {e}")
             return None
-        finally:
-            if driver:
-                driver.quit()
 
-    def get_html(self, url):
+    def get_html(self, url, streaming=True):
         """Try requests first, fallback to Selenium"""
-        soup = self.get_html_with_requests(url)
+        return scrape_engine.run(self.aget_html(url, streaming))
+
+    async def aget_html(self, url, streaming=True):
+        soup, _ = await self.aget_page(url, streaming)
+        return soup
+
+    async def aget_page(self, url, streaming=True):
+        """Like aget_html, plus whether reading the page stopped before its end"""
+        soup, stopped = await self.aget_page_with_requests(url, streaming)
         if soup:
-            return soup
+            return soup, stopped
         
         logger.info("Falling back to Selenium...")
-        return self.get_html_with_selenium(url)
+        return await scrape_engine.to_browser_thread(self.get_html_with_selenium, url), False
 
     def calculate_review_score(self, element):
         """Calculate how likely an element is to be a review"""
-        score = 0
-        text = element.get_text(strip=True).lower()
-        
-        # Text length scoring (reviews are usually 20-2000 characters)
-        text_length = len(text)
-        if 20 <= text_length <= 2000:
-            score += 10
-        elif 10 <= text_length <= 20:
-            score += 5
-        elif text_length > 2000:
-            score -= 5
-        
-        # Content pattern matching
-        for pattern in self.review_indicators['text_patterns']:
-            matches = len(re.findall(pattern, text, re.IGNORECASE))
-            score += matches * 3
-        
-        # HTML structure scoring
-        class_attr = element.get('class', [])
-        id_attr = element.get('id', '')
-        
-        # Check class names
-        for class_name in class_attr:
-            for pattern in self.review_indicators['class_patterns']:
-                if re.search(pattern, class_name, re.IGNORECASE):
-                    score += 5
-        
-        # Check ID
-        for pattern in self.review_indicators['id_patterns']:
-            if re.search(pattern, id_attr, re.IGNORECASE):
-                score += 5
-        
-        # Check for rating indicators (stars, numbers)
-        if re.search(r'\b[1-5]\s*(star|out of|/5)\b', text, re.IGNORECASE):
-            score += 8
-        
-        # Check for common review phrases
-        review_phrases = [
-            'i bought', 'purchased', 'received', 'delivery', 'shipping',
-            'would recommend', 'not recommend', 'satisfied', 'disappointed',
-            'good quality', 'poor quality', 'value for money', 'waste of money'
-        ]
-        
-        for phrase in review_phrases:
-            if phrase in text:
-                score += 4
-        
-        # Penalty for very short or very long texts
-        if text_length < 10:
-            score -= 10
-        elif text_length > 3000:
-            score -= 5
-        
-        return score
+        return self.scorer.score_element(element)
 
-    def detect_reviews_automatically(self, soup):
+    def detect_reviews_automatically(self, soup, url=None):
         """Automatically detect review elements using AI-like scoring"""
-        potential_reviews = []
-        
-        # Get all text-containing elements
-        all_elements = soup.find_all(['div', 'p', 'span', 'article', 'section', 'li'])
+        domain = urlparse(url).netloc.lower() if url else None
+        
+        # Try the container signature that worked for this domain before
+        layout = self.layouts.get(domain) if domain else None
+        if layout:
+            candidates = self.score_learned_layout(soup, layout)
+            filtered_reviews = self.filter_review_candidates(candidates, lambda candidate: candidate[2])
+            # A layout that drifted onto a stray block matches only a review or two;
+            # treat that as a miss so the full scan runs and relearns the layout
+            if len(filtered_reviews) >= max(MIN_LAYOUT_REVIEWS, layout.get('count', 0) * LAYOUT_MATCH_RATIO):
+                self.layouts.record_hit(domain)
+                logger.info(f"Detected {len(filtered_reviews)} potential reviews with the learned layout for {domain}")
+                return filtered_reviews
+            self.layouts.record_miss(domain)
+        
+        # Score all text-containing elements in one walk of the page, keeping
+        # (element, score, start, end) records of those over the review threshold
+        page, candidates = self.scorer.score_page(soup, self.review_candidate_tags, min_score=15)
+        
+        # Keep one candidate per repeated review card instead of every nested level of it
+        candidates = ReviewCardFinder().select(candidates)
+        
+        filtered_reviews = self.filter_review_candidates(candidates, lambda candidate: page.raw_slice(candidate[2], candidate[3]))
+        if domain:
+            self.learn_layout(domain, filtered_reviews)
         
-        for element in all_elements:
-            score = self.calculate_review_score(element)
-            
-            if score >= 15:  # Threshold for considering as review
-                potential_reviews.append({
-                    'element': element,
-                    'score': score,
-                    'text': element.get_text(strip=True)
-                })
-        
-        # Sort by score and return top candidates
-        potential_reviews.sort(key=lambda x: x['score'], reverse=True)
+        logger.info(f"Detected {len(filtered_reviews)} potential reviews")
+        return filtered_reviews
+
+    def score_learned_layout(self, soup, layout):
+        """Score only the elements matching a learned container signature"""
+        candidates = []
+        for element in find_by_signature(soup, layout['path'], layout['classes']):
+            text = element.get_text(strip=True)
+            score = self.scorer.score_text(text, element.get('class', []), element.get('id', ''))
+            if score >= 15:
+                candidates.append((element, score, text))
+        return candidates
+
+    def learn_layout(self, domain, reviews):
+        """Remember the signature shared by most of the detected reviews"""
+        signatures = Counter(
+            (tuple(element_path(review['element'])), tuple(sorted(review['element'].get('class', []))))
+            for review in reviews
+        )
+        if not signatures:
+            return
+        (path, classes), count = signatures.most_common(1)[0]
+        # A single match is not a repeating layout
+        if count >= MIN_LAYOUT_REVIEWS:
+            self.layouts.learn(domain, list(path), list(classes), count)
+
+    def filter_review_candidates(self, candidates, text_of):
+        """Take candidates best score first, dropping short texts and near-duplicates, until 50 are kept.
+
+        candidates are (element, score, ...) records and text_of(candidate) gives a
+        candidate's text. Candidates are popped from a heap instead of sorting them all,
+        so text is only read for those looked at before the top 50 are filled.
+        """
+        # Equal scores pop in document order, as with a stable sort
+        heap = [(-candidate[1], position) for position, candidate in enumerate(candidates)]
+        heapq.heapify(heap)
         
-        # Filter out duplicates and nested elements
         filtered_reviews = []
-        seen_texts = set()
+        seen_texts = NearDuplicateIndex(threshold=0.8)
         
-        for review in potential_reviews:
-            text = review['text']
+        while heap and len(filtered_reviews) < self.max_reviews:  # Limit to top 50 reviews
+            _, position = heapq.heappop(heap)
+            candidate = candidates[position]
+            text = text_of(candidate)
+            if len(text) <= 20:
+                continue
             
             # Skip if we've seen very similar text
-            is_duplicate = False
-            for seen_text in seen_texts:
-                if difflib.SequenceMatcher(None, text.lower(), seen_text.lower()).ratio() > 0.8:
-                    is_duplicate = True
-                    break
-            
-            if not is_duplicate and len(text) > 20:
-                filtered_reviews.append(review)
+            if not seen_texts.find(text.lower()):
+                filtered_reviews.append({
+                    'element': candidate[0],
+                    'score': candidate[1],
+                    'text': text
+                })
                 seen_texts.add(text.lower())
-                
-                if len(filtered_reviews) >= 50:  # Limit to top 50 reviews
-                    break
         
-        logger.info(f"Detected {len(filtered_reviews)} potential reviews")
         return filtered_reviews
 
     def extract_rating_from_text(self, text, element):
@@ -267,7 +321,7 @@ class UniversalReviewScraper:
                     return min(5, rating)  # Cap at 5
         
         # Look in nearby elements for rating
-        parent = element.parent
+        parent = element.parent if element is not None else None
         if parent:
             parent_text = parent.get_text()
             for pattern in rating_patterns:
@@ -352,7 +406,22 @@ class UniversalReviewScraper:
         
         return None
 
-    def extract_product_info_universal(self, soup, url):
+    def extract_product_info_universal(self, soup, url, structured_product=None):
+        """Extract product information, preferring schema.org structured data over page patterns"""
+        if structured_product is None:
+            structured_product = extract_structured_data(soup, url)['product']
+        if not structured_product or not structured_product.get('name'):
+            return self.extract_product_info_heuristic(soup, url)
+        
+        product_info = dict(structured_product)
+        if not (product_info['image_url'] and product_info['price'] and product_info['rating']):
+            fallback_info = self.extract_product_info_heuristic(soup, url)
+            for key in ('image_url', 'price', 'rating'):
+                if not product_info[key]:
+                    product_info[key] = fallback_info[key]
+        return product_info
+
+    def extract_product_info_heuristic(self, soup, url):
         """Extract product information using universal patterns"""
         try:
             # Extract product name
@@ -436,63 +505,109 @@ class UniversalReviewScraper:
                 'url': url
             }
 
-    def scrape_product(self, url):
+    def scrape_product(self, url, progress_callback=None):
         """Main scraping method for any website"""
+        return collect_scraped_items(self.iter_product(url, progress_callback), url)
+
+    def iter_product(self, url, progress_callback=None):
+        """Yield the product information, then the reviews found on the page"""
+        return scrape_engine.iterate(self.aiter_product(url, progress_callback))
+
+    async def aiter_product(self, url, progress_callback=None):
+        """Async iter_product: fetches run on the engine loop, parsing and extraction on worker threads"""
         try:
             logger.info(f"Starting universal scraping for: {url}")
             
             # Get HTML content
-            soup = self.get_html(url)
+            soup, stopped = await self.aget_page(url)
             if not soup:
-                return {'success': False, 'error': 'Failed to load webpage'}
-            
-            # Extract product information
-            product_data = self.extract_product_info_universal(soup, url)
+                yield {'type': 'error', 'error': 'Failed to load webpage'}
+                return
             
-            # Detect and extract reviews
-            detected_reviews = self.detect_reviews_automatically(soup)
+            # Structured data (JSON-LD / microdata) is cheaper and more accurate than heuristics
+            structured = await scrape_engine.to_thread(extract_structured_data, soup, url)
             
-            if not detected_reviews:
-                return {'success': False, 'error': 'No reviews found on this page'}
+            # Extract product information
+            product_data = await scrape_engine.to_thread(self.extract_product_info_universal, soup, url, structured['product'])
+            if progress_callback:
+                progress_callback('product', {'product': product_data})
+            yield {'type': 'product', 'product': product_data}
             
-            # Process detected reviews
             reviews_data = []
-            for review_data in detected_reviews:
-                element = review_data['element']
-                text = review_data['text']
-                
-                # Skip very short reviews
-                if len(text) < 20:
-                    continue
+            if structured['reviews']:
+                logger.info(f"Found {len(structured['reviews'])} reviews in structured data")
+                reviews_data = await scrape_engine.to_thread(self.build_structured_reviews, structured['reviews'])
+                if not reviews_data:
+                    logger.info("No usable reviews in structured data, detecting them in the page instead")
+            
+            if not reviews_data:
+                # Detect and extract reviews
+                detected_reviews = await scrape_engine.to_thread(self.detect_reviews_automatically, soup, url)
                 
-                rating = self.extract_rating_from_text(text, element)
-                author = self.extract_author_from_element(element)
-                date = self.extract_date_from_element(element)
+                if not detected_reviews:
+                    yield {'type': 'error', 'error': 'No reviews found on this page'}
+                    return
                 
-                reviews_data.append({
-                    'text': text,
-                    'rating': rating,
-                    'author': author,
-                    'date': date,
-                    'score': review_data['score']
-                })
+                # Process detected reviews
+                reviews_data = await scrape_engine.to_thread(self.build_reviews, detected_reviews)
             
             if not reviews_data:
-                return {'success': False, 'error': 'No valid reviews found'}
+                yield {'type': 'error', 'error': 'No valid reviews found'}
+                return
             
-            logger.info(f"Successfully extracted {len(reviews_data)} reviews")
+            if progress_callback:
+                progress_callback('reviews_page', {'page': 1, 'reviews': len(reviews_data), 'totalReviews': len(reviews_data)})
             
-            return {
-                'success': True,
-                'product': product_data,
-                'reviews': reviews_data,
-                'total_reviews': len(reviews_data),
-                'scraped_url': url
-            }
+            logger.info(f"Successfully extracted {len(reviews_data)} reviews")
+            # The whole page was read and the review cap not reached, so every review it has was seen
+            complete = not stopped and len(reviews_data) < self.max_reviews
+            yield {'type': 'reviews', 'reviews': reviews_data, 'complete': complete}
             
         except Exception as e:
             logger.error(f"Error in universal scraping: {str(e)}")
-            return {'success': False, 'error': f'Scraping failed: {str(e)}'}
+            yield {'type': 'error', 'error': f'Scraping failed: {str(e)}'}
+
+    def build_reviews(self, detected_reviews):
+        """Turn detected review elements into review dicts"""
+        reviews_data = []
+        for review_data in detected_reviews:
+            element = review_data['element']
+            text = review_data['text']
+            
+            # Skip very short reviews
+            if len(text) < 20:
+                continue
+            
+            rating = self.extract_rating_from_text(text, element)
+            author = self.extract_author_from_element(element)
+            date = self.extract_date_from_element(element)
+            
+            reviews_data.append({
+                'text': text,
+                'rating': rating,
+                'author': author,
+                'date': date,
+                'score': review_data['score']
+            })
+        return reviews_data
+
+    def build_structured_reviews(self, structured_reviews):
+        """Review dicts from structured data reviews, estimating missing ratings from the text"""
+        reviews_data = []
+        for review in structured_reviews:
+            if len(review['text']) < 20:
+                continue
+            rating = review['rating']
+            if rating is None:
+                rating = self.extract_rating_from_text(review['text'], None)
+            reviews_data.append({
+                'text': review['text'],
+                'rating': rating,
+                'author': review['author'],
+                'date': review['date'],
+                'score': None
+            })
+        return reviews_data[:self.max_reviews]
 
     def find_review_pages(self, soup, base_url):
         """Find additional review pages or pagination"""
@@ -505,64 +620,59 @@ class UniversalReviewScraper:
             text = link.get_text(strip=True).lower()
             
             if any(keyword in text for keyword in ['review', 'more review', 'all review', 'next', 'page']):
-                if href.startswith('/'):
-                    href = urljoin(base_url, href)
-                review_links.append(href)
+                href = urljoin(base_url, href)
+                if urlparse(href).scheme in ('http', 'https'):
+                    review_links.append(href)
         
-        return review_links[:3]  # Limit to 3 additional pages
+        return review_links[:3]  # Limit to 3 additional pages per page
+
+    def scrape_with_pagination(self, url, max_pages=3, target_reviews=None, max_workers=3, per_host_concurrency=2):
+        """Scrape reviews from a page and the review pages it links to, several pages at a time.
 
-    def scrape_with_pagination(self, url, max_pages=3):
-        """Scrape reviews with pagination support"""
+        Pagination links are followed from every fetched page. Fetches to one host are
+        limited to per_host_concurrency at once and paced by the politeness scheduler.
+        The crawl stops after max_pages pages or once target_reviews reviews were
+        collected.
+        """
+        frontier = CrawlFrontier(max_pages=max_pages, per_host_concurrency=per_host_concurrency)
+        frontier.add(url)
+        
+        page_reviews = {}
+        lock = threading.Lock()
+        
+        def crawl():
+            while True:
+                current_url = frontier.next_url()
+                if current_url is None:
+                    return
+                try:
+                    logger.info(f"Scraping page: {current_url}")
+                    # Pagination links usually follow the reviews, so read whole pages here
+                    soup = self.get_html(current_url, streaming=False)
+                    if not soup:
+                        continue
+                    
+                    reviews = self.build_reviews(self.detect_reviews_automatically(soup, current_url))
+                    with lock:
+                        page_reviews[current_url] = reviews
+                        collected = sum(len(r) for r in page_reviews.values())
+                    if target_reviews and collected >= target_reviews:
+                        frontier.stop()
+                        continue
+                    
+                    for link in self.find_review_pages(soup, current_url):
+                        frontier.add(link)
+                except Exception as e:
+                    logger.error(f"Error scraping page {current_url}: {str(e)}")
+                finally:
+                    frontier.release(current_url)
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pagination') as executor:
+            for _ in range(max_workers):
+                executor.submit(crawl)
+        
+        # Return reviews in the order the pages were discovered
         all_reviews = []
-        visited_urls = set()
-        urls_to_visit = [url]
-        
-        page_count = 0
-        while urls_to_visit and page_count < max_pages:
-            current_url = urls_to_visit.pop(0)
-            
-            if current_url in visited_urls:
-                continue
-                
-            visited_urls.add(current_url)
-            
-            logger.info(f"Scraping page {page_count + 1}: {current_url}")
-            
-            soup = self.get_html(current_url)
-            if not soup:
-                continue
-            
-            # Extract reviews from current page
-            detected_reviews = self.detect_reviews_automatically(soup)
-            
-            for review_data in detected_reviews:
-                element = review_data['element']
-                text = review_data['text']
-                
-                if len(text) < 20:
-                    continue
-                
-                rating = self.extract_rating_from_text(text, element)
-                author = self.extract_author_from_element(element)
-                date = self.extract_date_from_element(element)
-                
-                all_reviews.append({
-                    'text': text,
-                    'rating': rating,
-                    'author': author,
-                    'date': date,
-                    'score': review_data['score']
-                })
-            
-            # Find additional review pages
-            if page_count == 0:  # Only look for pagination on first page
-                additional_urls = self.find_review_pages(soup, current_url)
-                urls_to_visit.extend(additional_urls)
-            
-            page_count += 1
-            
-            # Be respectful with delays
-            if page_count < max_pages:
-                time.sleep(random.uniform(2, 4))
-        
+        for page_url in frontier.seen_order:
+            all_reviews.extend(page_reviews.get(page_url, []))
         return all_reviews
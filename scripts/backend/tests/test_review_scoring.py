@@ -0,0 +1,41 @@
+"""score_page must give the same scores as scoring each element on its own, in near-linear time."""
+import time
+from bs4 import BeautifulSoup
+from scraper.universal_scraper import UniversalReviewScraper
+
+scraper = UniversalReviewScraper()
+
+def list_page(items):
+    # Adjacent stripped texts join into one long word run ("itemsku0itemsku1...")
+    rows = ''.join(f'<li><span>item</span><span>sku{i}</span></li>' for i in range(items))
+    return BeautifulSoup(f'<html><body><ul>{rows}</ul></body></html>', 'html.parser')
+
+def time_score_page(soup):
+    started = time.perf_counter()
+    scraper.scorer.score_page(soup, scraper.review_candidate_tags)
+    return time.perf_counter() - started
+
+def test_scores_match_per_element_scoring():
+    html = (
+        '<div class="review-list"><div class="review"><span>5 out of 5</span><p>Great product, '
+        'highly recommend it. I bought this last month and it works well.</p></div>'
+        '<div class="review"><span>Rated 2</span><span>stars</span><p>Verified purchase but not worth it, '
+        'poor quality</p></div><p>excellent</p><span>goodbadexcellent</span></div>'
+    )
+    soup = BeautifulSoup(html, 'html.parser')
+    page, scored = scraper.scorer.score_page(soup, scraper.review_candidate_tags)
+
+    assert scored
+    for element, score, start, end in scored:
+        assert page.raw_slice(start, end) == element.get_text(strip=True)
+        assert score == scraper.scorer.score_element(element)
+
+def test_score_page_is_near_linear_on_long_word_runs():
+    small, large = list_page(1000), list_page(4000)
+    # Warm up caches so the first run does not skew the ratio
+    time_score_page(small)
+    small_time = min(time_score_page(small) for _ in range(3))
+    large_time = min(time_score_page(large) for _ in range(3))
+
+    # 4x the elements: linear is ~4x, quadratic ~16x
+    assert large_time < max(small_time, 0.01) * 8
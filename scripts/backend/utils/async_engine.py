@@ -0,0 +1,221 @@
+import asyncio
+import threading
+import time
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import httpx
+from .config_loader import config_loader
+from .host_scheduler import politeness
+from .response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+CHUNK_SIZE = 64 * 1024
+DEFAULT_MAX_RESPONSE_BYTES = 10 * 1024 * 1024
+
+class ResponseTooLarge(httpx.HTTPError):
+    """The response body is bigger than the engine's size cap"""
+
+def _no_cookie_jar():
+    """A cookie jar that never stores a cookie (an empty allowed_domains list rejects every domain)"""
+    return CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+
+def _replay(page, should_stop):
+    """Feed a cached page to should_stop chunk by chunk, as if it were downloading"""
+    response = httpx.Response(200, headers={'Content-Type': page.content_type} if page.content_type else {})
+    for end in range(CHUNK_SIZE, len(page.body) + CHUNK_SIZE, CHUNK_SIZE):
+        if should_stop(page.body[end - CHUNK_SIZE:end], response):
+            return page.body[:end]
+    return page.body
+
+class ScrapeEngine:
+    def __init__(self, timeout=None, max_retries=None, max_response_bytes=None, max_connections=100,
+                 max_keepalive_connections=20, max_connections_per_host=10, browser_workers=None):
+        """Run scraper coroutines for every analysis on one event loop in a background thread.
+
+        Page fetches go through one httpx.AsyncClient and wait for their host's slot
+        from the politeness scheduler, so while one analysis waits for a page or a
+        slot, the others keep going. Pages are served from or revalidated against the
+        response cache first. At most max_connections_per_host downloads run against
+        one host at a time, within the client's overall connection limits. timeout,
+        max_retries and max_response_bytes default to the default_timeout, max_retries
+        and max_response_bytes settings, and every download is counted in the per-host
+        stats of get_stats(). Blocking work is handed to worker threads:
+        parsing with to_thread(), Selenium page loads with to_browser_thread() on their
+        own browser_workers threads, so slow fallbacks cannot use up the threads
+        parsing needs. iterate() and run() are the sync facades.
+        """
+        settings = config_loader.get_settings()
+        self.timeout = timeout if timeout is not None else settings.get('default_timeout', 15)
+        self.max_retries = max_retries if max_retries is not None else settings.get('max_retries', 3)
+        self.max_response_bytes = max_response_bytes or settings.get('max_response_bytes', DEFAULT_MAX_RESPONSE_BYTES)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections)
+        self.max_connections_per_host = max_connections_per_host
+        self.host_slots = {}
+        if browser_workers is None:
+            # The universal and Flipkart scrapers each keep selenium_pool_size browsers
+            browser_workers = 2 * settings.get('selenium_pool_size', 2)
+        self.browser_executor = ThreadPoolExecutor(max_workers=browser_workers, thread_name_prefix='selenium')
+        self.loop = None
+        self.client = None
+        self.lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.stats = {}
+
+    def _ensure_loop(self):
+        with self.lock:
+            if self.loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='scrape-engine', daemon=True).start()
+                self.loop = loop
+                logger.info("Started scrape engine event loop")
+            return self.loop
+
+    def _get_client(self):
+        # Only called on the loop thread, so no lock is needed
+        if self.client is None:
+            # The client serves every analysis and site, so it must not carry one
+            # scrape's session or bot-tracking cookies into the others
+            self.client = httpx.AsyncClient(
+                timeout=self.timeout, limits=self.limits, follow_redirects=True, cookies=_no_cookie_jar()
+            )
+        return self.client
+
+    def _host_slot(self, host):
+        # Only called on the loop thread, like _get_client()
+        slot = self.host_slots.get(host)
+        if slot is None:
+            slot = self.host_slots[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return slot
+
+    def _record(self, host, seconds, size, error=False):
+        """Add one download to the per-host counters"""
+        with self.stats_lock:
+            host_stats = self.stats.setdefault(host, {'requests': 0, 'errors': 0, 'seconds': 0.0, 'bytes': 0})
+            host_stats['requests'] += 1
+            host_stats['seconds'] += seconds
+            host_stats['bytes'] += size
+            if error:
+                host_stats['errors'] += 1
+
+    def get_stats(self):
+        """Per-host request counts, errors, bytes and average seconds per request"""
+        with self.stats_lock:
+            return {
+                host: dict(host_stats, averageSeconds=host_stats['seconds'] / host_stats['requests'] if host_stats['requests'] else 0.0)
+                for host, host_stats in self.stats.items()
+            }
+
+    def submit(self, coroutine):
+        """Schedule a coroutine on the engine loop and return a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop())
+
+    def run(self, coroutine):
+        """Run a coroutine on the engine loop and wait for its result"""
+        return self.submit(coroutine).result()
+
+    def iterate(self, async_iterator):
+        """Yield the items of an async generator from a regular thread"""
+        try:
+            while True:
+                try:
+                    yield self.run(async_iterator.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            # The consumer stopped early: let the generator run its cleanup on the loop
+            if self.loop is not None:
+                self.submit(async_iterator.aclose())
+
+    async def to_thread(self, func, *args):
+        """Run blocking work on a worker thread without stalling the loop"""
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def to_browser_thread(self, func, *args):
+        """Run a Selenium page load on the browser threads, which may wait long for a driver"""
+        return await asyncio.get_running_loop().run_in_executor(self.browser_executor, func, *args)
+
+    async def fetch(self, url, headers=None, should_stop=None):
+        """GET a page and return its body, retrying connection errors and 429/5xx answers.
+
+        should_stop(chunk, response) is called on a worker thread for every chunk of
+        the body; when it returns True the rest is not downloaded and the bytes read
+        so far are returned. Pages from the response cache are fed to it the same
+        way, and only callers passing should_stop are given pages that an earlier
+        streamed download stopped early.
+        """
+        page, validators = await self.to_thread(response_cache.get, url, should_stop is not None)
+        if page is not None:
+            return await self._from_cache(page, should_stop)
+
+        attempt = 0
+        while True:
+            try:
+                return await self._fetch_once(url, headers, should_stop, validators)
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                retryable = isinstance(e, httpx.TransportError) or e.response.status_code in RETRY_STATUSES
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                delay = 0.5 * 2 ** (attempt - 1)
+                retry_after = e.response.headers.get('Retry-After', '') if isinstance(e, httpx.HTTPStatusError) else ''
+                if retry_after.isdigit():
+                    delay = max(delay, int(retry_after))
+                logger.info(f"Retrying {url} in {delay}s after: {e}")
+                await asyncio.sleep(delay)
+
+    async def _from_cache(self, page, should_stop):
+        if should_stop is None:
+            return page.body
+        return await self.to_thread(_replay, page, should_stop)
+
+    async def _fetch_once(self, url, headers, should_stop, validators):
+        host = urlparse(url).netloc
+        # Waiting for the host's slot only holds up this task, not other hosts' fetches
+        await politeness.await_turn(url)
+        await self._host_slot(host).acquire()
+        started = time.monotonic()
+        size = 0
+        stopped = False
+        chunks = []
+        try:
+            async with self._get_client().stream('GET', url, headers=dict(headers or {}, **validators)) as response:
+                if response.status_code != 304 or not validators:
+                    response.raise_for_status()
+                    content_length = response.headers.get('Content-Length', '')
+                    if content_length.isdigit() and int(content_length) > self.max_response_bytes:
+                        raise ResponseTooLarge(f"{url} is {content_length} bytes, over the {self.max_response_bytes} byte limit")
+
+                    async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > self.max_response_bytes:
+                            raise ResponseTooLarge(f"{url} is over the {self.max_response_bytes} byte limit")
+                        chunks.append(chunk)
+                        # The scanner parses HTML, so it runs on a worker thread, not the loop
+                        if should_stop and await self.to_thread(should_stop, chunk, response):
+                            stopped = True
+                            break
+        except Exception:
+            self._record(host, time.monotonic() - started, size, error=True)
+            raise
+        finally:
+            self._host_slot(host).release()
+
+        self._record(host, time.monotonic() - started, size)
+        if response.status_code == 304:
+            page = await self.to_thread(response_cache.revalidated, url, response.headers)
+            if page is None:
+                # The stored copy went missing meanwhile; download the page again
+                return await self._fetch_once(url, headers, should_stop, {})
+            return await self._from_cache(page, should_stop)
+
+        body = b''.join(chunks)
+        # A page cut short is kept as a partial entry, for the next streamed fetch
+        await self.to_thread(response_cache.store, url, response.status_code, response.headers, body, not stopped)
+        return body
+
+# Global instance shared by all scrapers
+scrape_engine = ScrapeEngine()
@@ -0,0 +1,35 @@
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+class DomainFanOut:
+    def __init__(self, concurrency_limits=None, default_limit=2):
+        """Keep one bounded worker pool per scraper group so each site family has its own concurrency cap"""
+        self.concurrency_limits = concurrency_limits or {}
+        self.default_limit = default_limit
+        self.executors = {}
+        self.lock = threading.Lock()
+
+    def get_executor(self, group):
+        """Get (or lazily create) the worker pool for a group"""
+        with self.lock:
+            executor = self.executors.get(group)
+            if executor is None:
+                max_workers = max(1, int(self.concurrency_limits.get(group, self.default_limit)))
+                executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f'batch-{group}')
+                self.executors[group] = executor
+                logger.info(f"Created batch pool for {group} with {max_workers} workers")
+            return executor
+
+    def submit(self, group, func, *args, **kwargs):
+        """Run a function on the group's pool and return its future"""
+        return self.get_executor(group).submit(func, *args, **kwargs)
+
+    def group_urls(self, validated_urls):
+        """Group validated URL entries by the 'group' key, preserving submission order"""
+        groups = {}
+        for entry in validated_urls:
+            groups.setdefault(entry['group'], []).append(entry)
+        return groups
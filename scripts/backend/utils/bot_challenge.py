@@ -0,0 +1,32 @@
+from .config_loader import config_loader
+
+# Text found on the CAPTCHA and robot-check pages sites send instead of the product page
+DEFAULT_MARKERS = [
+    '/errors/validatecaptcha',
+    'type the characters you see in this image',
+    'are you a robot',
+    'verify you are human',
+    'unusual traffic from your computer',
+    '<title>just a moment...</title>',
+    '_cf_chl_opt',
+    'captcha-delivery.com',
+    'px-captcha',
+    '<title>access denied</title>'
+]
+# Challenge pages are small; markers are only looked for in the start of a page
+SCAN_BYTES = 64 * 1024
+
+_markers = None
+
+def get_markers():
+    """Lower-cased byte markers from the bot_challenge_markers setting"""
+    global _markers
+    if _markers is None:
+        markers = config_loader.get_settings().get('bot_challenge_markers', DEFAULT_MARKERS)
+        _markers = [marker.lower().encode('utf-8') for marker in markers]
+    return _markers
+
+def is_bot_challenge(body):
+    """Whether a page body looks like a CAPTCHA or robot check rather than real content"""
+    head = body[:SCAN_BYTES].lower()
+    return any(marker in head for marker in get_markers())
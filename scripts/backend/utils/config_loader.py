@@ -69,6 +69,27 @@ class WebsiteConfigLoader:
         """Get application settings"""
         return self.config.get('settings', {})
     
+    def get_freshness_window(self, website_key: str) -> int:
+        """Get how long (in seconds) a stored analysis stays fresh for a website"""
+        default_window = self.get_settings().get('freshness_window', 0)
+        website_config = self.get_website_config(website_key) or {}
+        return int(website_config.get('freshness_window', default_window))
+    
+    def get_rate_limit_delay(self, website_key: Optional[str]) -> float:
+        """Get the minimum seconds between requests to a website (None for sites not in the config)"""
+        default_delay = self.get_settings().get('rate_limit_delay', 2)
+        website_config = (self.get_website_config(website_key) if website_key else None) or {}
+        return float(website_config.get('rate_limit_delay', default_delay))
+    
+    def get_website_for_domain(self, domain: str) -> Optional[str]:
+        """Get the website whose domains include a host, ignoring wildcard entries"""
+        domain = domain.lower()
+        for key, config in self.get_all_websites().items():
+            for config_domain in config.get('domains', []):
+                if config_domain != '*' and (domain == config_domain or domain.endswith('.' + config_domain)):
+                    return key
+        return None
+    
     def identify_website(self, url: str) -> Optional[str]:
         """Identify which website a URL belongs to"""
         try:
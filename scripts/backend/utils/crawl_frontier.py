@@ -0,0 +1,62 @@
+import threading
+import logging
+from collections import deque
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+class CrawlFrontier:
+    def __init__(self, max_pages=3, per_host_concurrency=2):
+        """Queue of pages to crawl that limits concurrent fetches per host"""
+        self.max_pages = max_pages
+        self.per_host_concurrency = per_host_concurrency
+        self.pending = deque()
+        self.seen = set()
+        self.seen_order = []
+        self.in_flight = 0
+        self.host_active = {}
+        self.stopped = False
+        self.condition = threading.Condition()
+    def add(self, url):
+        """Queue a URL unless it was seen before or the page budget is used up"""
+        with self.condition:
+            if self.stopped or url in self.seen or len(self.seen) >= self.max_pages:
+                return False
+            self.seen.add(url)
+            self.seen_order.append(url)
+            self.pending.append(url)
+            self.condition.notify_all()
+            return True
+
+    def next_url(self):
+        """Block until a queued URL may be fetched and claim it; None once the crawl is over"""
+        with self.condition:
+            while True:
+                if self.stopped or (not self.pending and self.in_flight == 0):
+                    return None
+
+                for url in self.pending:
+                    host = urlparse(url).netloc
+                    if self.host_active.get(host, 0) < self.per_host_concurrency:
+                        self.pending.remove(url)
+                        self.host_active[host] = self.host_active.get(host, 0) + 1
+                        self.in_flight += 1
+                        return url
+
+                # Every queued host is busy: wait for a fetch to finish
+                self.condition.wait()
+
+    def release(self, url):
+        """Mark a claimed URL as fetched"""
+        with self.condition:
+            host = urlparse(url).netloc
+            self.host_active[host] -= 1
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def stop(self):
+        """Stop handing out URLs, e.g. once enough reviews were collected"""
+        with self.condition:
+            self.stopped = True
+            self.pending.clear()
+            self.condition.notify_all()
@@ -0,0 +1,153 @@
+import atexit
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from selenium.webdriver.support.ui import WebDriverWait
+from .config_loader import config_loader
+
+logger = logging.getLogger(__name__)
+
+# Resources loaded so far; the page counts as network idle once this stops growing
+RESOURCE_COUNT_SCRIPT = "return performance.getEntriesByType('resource').length"
+SELECTOR_PRESENT_SCRIPT = """
+try { return document.querySelector(arguments[0]) !== null; } catch (e) { return false; }
+"""
+# Chrome only; used to recycle browsers whose page heap keeps growing
+HEAP_SIZE_SCRIPT = "return window.performance.memory ? performance.memory.usedJSHeapSize : 0"
+
+class _PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+
+class DriverPool:
+    def __init__(self, create_driver, max_drivers=None, max_pages_per_driver=None, max_memory_mb=None):
+        """Bounded pool of long-lived browsers leased out one page at a time.
+
+        Drivers are started by create_driver() on first demand, at most max_drivers at
+        once; callers wait for a free one beyond that. A driver is quit and replaced
+        after max_pages_per_driver pages, when its page heap passes max_memory_mb, or
+        when a lease ends with an error. Limits default to the selenium_pool_size,
+        selenium_max_pages_per_driver and selenium_max_memory_mb settings.
+        """
+        settings = config_loader.get_settings()
+        self.create_driver = create_driver
+        self.max_drivers = max_drivers or settings.get('selenium_pool_size', 2)
+        self.max_pages_per_driver = max_pages_per_driver or settings.get('selenium_max_pages_per_driver', 50)
+        self.max_memory_mb = max_memory_mb or settings.get('selenium_max_memory_mb', 512)
+
+        self.idle = []
+        self.started = 0
+        self.closed = False
+        self.condition = threading.Condition()
+        atexit.register(self.close)
+
+    def _acquire(self):
+        with self.condition:
+            while True:
+                if self.closed:
+                    raise RuntimeError("Driver pool is closed")
+                if self.idle:
+                    return self.idle.pop()
+                if self.started < self.max_drivers:
+                    self.started += 1
+                    break
+                self.condition.wait()
+
+        # Start the browser outside the lock; it takes seconds
+        try:
+            return _PooledDriver(self.create_driver())
+        except Exception:
+            with self.condition:
+                self.started -= 1
+                self.condition.notify()
+            raise
+
+    def _release(self, pooled, healthy):
+        if healthy and not self.closed and not self._worn_out(pooled):
+            with self.condition:
+                self.idle.append(pooled)
+                self.condition.notify()
+            return
+
+        self._quit(pooled)
+        with self.condition:
+            self.started -= 1
+            self.condition.notify()
+
+    def _worn_out(self, pooled):
+        if pooled.pages >= self.max_pages_per_driver:
+            logger.info(f"Recycling browser after {pooled.pages} pages")
+            return True
+        try:
+            heap_mb = (pooled.driver.execute_script(HEAP_SIZE_SCRIPT) or 0) / (1024 * 1024)
+        except Exception:
+            return True
+        if heap_mb > self.max_memory_mb:
+            logger.info(f"Recycling browser using {heap_mb:.0f} MB of page heap")
+            return True
+        return False
+
+    def _quit(self, pooled):
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            logger.warning(f"Error quitting browser: {e}")
+
+    @contextmanager
+    def lease(self):
+        """Borrow a driver for one page; it goes back to the pool (or is replaced) afterwards"""
+        pooled = self._acquire()
+        healthy = False
+        try:
+            yield pooled.driver
+            healthy = True
+        finally:
+            pooled.pages += 1
+            self._release(pooled, healthy)
+
+    def get_stats(self):
+        """Browsers running and idle"""
+        with self.condition:
+            return {'started': self.started, 'idle': len(self.idle), 'maxDrivers': self.max_drivers}
+
+    def close(self):
+        """Quit every idle browser and stop handing out new ones"""
+        with self.condition:
+            self.closed = True
+            idle, self.idle = self.idle, []
+            self.started -= len(idle)
+            self.condition.notify_all()
+        for pooled in idle:
+            self._quit(pooled)
+
+def wait_until_ready(driver, ready_selectors=(), timeout=15, idle_time=0.5):
+    """Wait until the page has loaded and either shows one of ready_selectors or its network went idle.
+
+    Returns which condition ended the wait: 'selector', 'idle' or 'timeout'.
+    """
+    deadline = time.monotonic() + timeout
+    try:
+        WebDriverWait(driver, timeout).until(
+            lambda d: d.execute_script("return document.readyState") == 'complete'
+        )
+    except Exception:
+        return 'timeout'
+
+    # One selector list so each poll is a single round trip to the browser
+    ready_selector = ', '.join(ready_selectors)
+    resource_count = None
+    stable_since = time.monotonic()
+    while time.monotonic() < deadline:
+        if ready_selector and driver.execute_script(SELECTOR_PRESENT_SCRIPT, ready_selector):
+            return 'selector'
+
+        count = driver.execute_script(RESOURCE_COUNT_SCRIPT)
+        if count != resource_count:
+            resource_count = count
+            stable_since = time.monotonic()
+        elif time.monotonic() - stable_since >= idle_time:
+            return 'idle'
+        time.sleep(0.1)
+    return 'timeout'
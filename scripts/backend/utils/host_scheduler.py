@@ -0,0 +1,70 @@
+import asyncio
+import threading
+import time
+import logging
+from urllib.parse import urlparse
+from .config_loader import config_loader
+
+logger = logging.getLogger(__name__)
+
+class _TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+class PolitenessScheduler:
+    def __init__(self, burst=None):
+        """Per-host token buckets that pace every page fetch, whichever request it belongs to.
+
+        A host earns one token per rate_limit_delay seconds (the per-site value from
+        websites.json if its domain is listed there, the global setting otherwise),
+        up to burst tokens. All domains of one configured site share a bucket. Taking
+        a token never blocks other hosts: callers get the time until their turn and
+        wait it out themselves, with wait() or await await_turn().
+        """
+        self.burst = burst or config_loader.get_settings().get('rate_limit_burst', 2)
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def _bucket_for(self, url):
+        host = (urlparse(url).hostname or '').lower()
+        website_key = config_loader.get_website_for_domain(host)
+        key = website_key or host
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            delay = config_loader.get_rate_limit_delay(website_key)
+            # A delay of 0 means no pacing for that site
+            bucket = _TokenBucket(1 / delay if delay > 0 else None, self.burst)
+            self.buckets[key] = bucket
+        return key, bucket
+
+    def reserve(self, url):
+        """Take the next token for url's host and return how many seconds to wait before fetching"""
+        with self.lock:
+            key, bucket = self._bucket_for(url)
+            if bucket.rate is None:
+                return 0.0
+
+            now = time.monotonic()
+            bucket.tokens = min(bucket.capacity, bucket.tokens + (now - bucket.updated) * bucket.rate)
+            bucket.updated = now
+            # Tokens may go negative: later callers queue up behind earlier reservations
+            bucket.tokens -= 1
+            wait = -bucket.tokens / bucket.rate if bucket.tokens < 0 else 0.0
+
+        if wait:
+            logger.debug(f"Waiting {wait:.2f}s for a request slot on {key}")
+        return wait
+
+    def wait(self, url):
+        """Block the calling thread until url's host may be fetched"""
+        time.sleep(self.reserve(url))
+
+    async def await_turn(self, url):
+        """Suspend the calling task until url's host may be fetched"""
+        await asyncio.sleep(self.reserve(url))
+
+# Global instance shared by all fetches
+politeness = PolitenessScheduler()
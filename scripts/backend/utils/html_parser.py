@@ -0,0 +1,42 @@
+import logging
+import threading
+from bs4 import BeautifulSoup, FeatureNotFound
+from .config_loader import config_loader
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARSER = 'html.parser'
+
+# BeautifulSoup tree builders the scrapers can run on. They all expose the same
+# soup API (find_all, select, get_text), so switching is a settings change only.
+SUPPORTED_PARSERS = ('html.parser', 'lxml', 'html5lib')
+
+_parser = None
+_lock = threading.Lock()
+
+def get_parser():
+    """Get the tree builder named by the html_parser setting, falling back to html.parser"""
+    global _parser
+    if _parser is None:
+        with _lock:
+            if _parser is None:
+                _parser = _resolve_parser(config_loader.get_settings().get('html_parser', DEFAULT_PARSER))
+    return _parser
+
+def _resolve_parser(name):
+    if name not in SUPPORTED_PARSERS:
+        logger.warning(f"Unknown html_parser '{name}', using {DEFAULT_PARSER}")
+        return DEFAULT_PARSER
+
+    try:
+        BeautifulSoup('', name)
+    except FeatureNotFound:
+        logger.warning(f"HTML parser '{name}' is not installed, using {DEFAULT_PARSER}")
+        return DEFAULT_PARSER
+
+    logger.info(f"Using HTML parser: {name}")
+    return name
+
+def parse_html(markup):
+    """Parse a page with the configured parser"""
+    return BeautifulSoup(markup, get_parser())
@@ -0,0 +1,101 @@
+import threading
+import time
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+class AnalysisJobManager:
+    def __init__(self, max_workers=4, max_pending=50, job_ttl=3600):
+        """Run analyses on a bounded worker pool and keep their status in memory"""
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis-worker')
+        self.max_pending = max_pending
+        self.job_ttl = job_ttl
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs):
+        """Queue an analysis function on the shared pool and return its job id, or None if the queue is full.
+
+        The function is called with an extra ``progress_callback(stage, details)``
+        keyword argument and must return a ``{'success': ..., 'data'/'error': ...}`` dict.
+        """
+        return self.submit_to(self.executor, func, *args, **kwargs)
+
+    def submit_to(self, executor, func, *args, **kwargs):
+        """Like submit, but run the job on a caller-provided executor"""
+        with self.lock:
+            self._prune_expired_jobs()
+
+            active_jobs = sum(1 for job in self.jobs.values() if job['status'] in ('queued', 'running'))
+            if active_jobs >= self.max_pending:
+                return None
+
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            self.jobs[job_id] = {
+                'id': job_id,
+                'status': 'queued',
+                'stage': 'queued',
+                'progress': {},
+                'result': None,
+                'error': None,
+                'status_code': None,
+                'created_at': now,
+                'updated_at': now
+            }
+
+        executor.submit(self._run_job, job_id, func, args, kwargs)
+        return job_id
+
+    def get_job(self, job_id):
+        """Return a snapshot of a job, or None if it is unknown or expired"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def get_stats(self):
+        """Count jobs by status"""
+        with self.lock:
+            stats = {'queued': 0, 'running': 0, 'completed': 0, 'failed': 0}
+            for job in self.jobs.values():
+                stats[job['status']] = stats.get(job['status'], 0) + 1
+            return stats
+
+    def _run_job(self, job_id, func, args, kwargs):
+        self._update_job(job_id, status='running', stage='started')
+
+        def progress_callback(stage, details=None):
+            self._update_job(job_id, stage=stage, progress=details or {})
+
+        try:
+            result = func(*args, progress_callback=progress_callback, **kwargs)
+        except Exception as e:
+            logger.error(f"Error in analysis job {job_id}: {str(e)}")
+            self._update_job(job_id, status='failed', stage='failed',
+                             error='Internal server error occurred', status_code=500)
+            return
+
+        if result.get('success'):
+            self._update_job(job_id, status='completed', stage='done', result=result['data'])
+        else:
+            self._update_job(job_id, status='failed', stage='failed',
+                             error=result.get('error'), status_code=result.get('status_code', 500))
+
+    def _update_job(self, job_id, **fields):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job:
+                job.update(fields)
+                job['updated_at'] = time.time()
+
+    def _prune_expired_jobs(self):
+        """Drop finished jobs older than the TTL (caller must hold the lock)"""
+        cutoff = time.time() - self.job_ttl
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job['status'] in ('completed', 'failed') and job['updated_at'] < cutoff
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
@@ -0,0 +1,106 @@
+import atexit
+import json
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..')
+DEFAULT_STORE_PATH = os.path.join(PROJECT_ROOT, 'data', 'review_layouts.json')
+# Seconds between writes of counter changes; a new signature is written at once
+SAVE_INTERVAL = 30.0
+
+class ReviewLayoutStore:
+    def __init__(self, path=None):
+        """Remember, per domain, the review container signature that worked last time.
+
+        Each entry holds the tag path and class set of the review elements, how many
+        reviews matched it when it was learned, and hit and miss counters, and is persisted to a JSON file so it survives restarts. New
+        signatures are written right away; counter updates at most every
+        SAVE_INTERVAL seconds and at exit.
+        """
+        if path is None:
+            path = DEFAULT_STORE_PATH
+        elif not os.path.isabs(path):
+            path = os.path.join(PROJECT_ROOT, path)
+
+        self.path = path
+        self.lock = threading.Lock()
+        # Held while writing the file, so lookups never wait for the disk
+        self.save_lock = threading.Lock()
+        self.dirty = False
+        self.last_save = time.monotonic()
+        self.layouts = self._load()
+        atexit.register(self.flush)
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read review layouts from {self.path}: {e}")
+            return {}
+
+    def flush(self):
+        """Write the store atomically if it changed since the last write"""
+        with self.save_lock:
+            with self.lock:
+                if not self.dirty:
+                    return
+                snapshot = {domain: dict(layout) for domain, layout in self.layouts.items()}
+                self.dirty = False
+                self.last_save = time.monotonic()
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                temp_path = f"{self.path}.tmp"
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f, indent=2)
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Could not save review layouts to {self.path}: {e}")
+
+    def get(self, domain):
+        """Get a copy of the layout learned for a domain, or None"""
+        with self.lock:
+            layout = self.layouts.get(domain)
+            return dict(layout) if layout else None
+
+    def learn(self, domain, path, classes, count):
+        """Store the signature that just matched count reviews on a domain, keeping its counters if unchanged"""
+        with self.lock:
+            layout = self.layouts.get(domain)
+            if layout and layout['path'] == path and layout['classes'] == classes:
+                if layout.get('count') != count:
+                    layout['count'] = count
+                    self.dirty = True
+                return
+            self.layouts[domain] = {
+                'path': path,
+                'classes': classes,
+                'count': count,
+                'hits': 0,
+                'misses': layout['misses'] if layout else 0,
+                'updated_at': time.time()
+            }
+            self.dirty = True
+        self.flush()
+
+    def record_hit(self, domain):
+        self._count(domain, 'hits')
+
+    def record_miss(self, domain):
+        self._count(domain, 'misses')
+
+    def _count(self, domain, counter):
+        with self.lock:
+            layout = self.layouts.get(domain)
+            if layout:
+                layout[counter] += 1
+                layout['updated_at'] = time.time()
+                self.dirty = True
+        if self.dirty and time.monotonic() - self.last_save >= SAVE_INTERVAL:
+            self.flush()
@@ -0,0 +1,96 @@
+import difflib
+
+HASH_MASK = (1 << 64) - 1
+
+class NearDuplicateIndex:
+    def __init__(self, threshold=0.8, shingle_size=3, bands=32, rows=2):
+        """Find texts whose difflib similarity ratio to an indexed text is above a threshold.
+
+        Texts are sketched with one-permutation MinHash over character shingles and
+        bucketed with LSH bands, so a lookup only runs SequenceMatcher against the
+        texts that share a band instead of against everything indexed so far. The
+        bands are tuned for recall: similar texts almost always collide and the
+        exact ratio decides.
+        """
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.bands = bands
+        self.rows = rows
+        self.num_bins = bands * rows
+        self.buckets = {}
+        self.exact = set()
+        self.matchers = []
+        # Texts too short to shingle are compared directly
+        self.unsketched = []
+
+    def _signature(self, text):
+        size = self.shingle_size
+        if len(text) < size:
+            return None
+
+        num_bins = self.num_bins
+        bins = [None] * num_bins
+        for shingle in {text[i:i + size] for i in range(len(text) - size + 1)}:
+            value = hash(shingle) & HASH_MASK
+            index = value % num_bins
+            value //= num_bins
+            if bins[index] is None or value < bins[index]:
+                bins[index] = value
+
+        # Fill empty bins from the next filled bin to the right (densified one-permutation
+        # hashing), tagging each value with how far it was borrowed from
+        signature = [None] * num_bins
+        source = None
+        for i in range(2 * num_bins - 1, -1, -1):
+            index = i % num_bins
+            if bins[index] is not None:
+                source = index
+            if source is not None and signature[index] is None:
+                signature[index] = (bins[source], (source - index) % num_bins)
+        return signature
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [(band, tuple(signature[band * rows:(band + 1) * rows])) for band in range(self.bands)]
+
+    def _is_similar(self, matcher, text):
+        matcher.set_seq1(text)
+        # Cheap upper bounds first; ratio() is the expensive part
+        return (matcher.real_quick_ratio() > self.threshold
+                and matcher.quick_ratio() > self.threshold
+                and matcher.ratio() > self.threshold)
+
+    def find(self, text):
+        """Return True if an indexed text is similar enough to text"""
+        if text in self.exact:
+            return True
+
+        signature = self._signature(text)
+        if signature is None:
+            candidates = range(len(self.matchers))
+        else:
+            candidates = set(self.unsketched)
+            for key in self._band_keys(signature):
+                candidates.update(self.buckets.get(key, ()))
+            candidates = sorted(candidates)
+
+        return any(self._is_similar(self.matchers[i], text) for i in candidates)
+
+    def add(self, text):
+        """Index a text"""
+        if text in self.exact:
+            return
+        self.exact.add(text)
+
+        # SequenceMatcher caches its analysis of seq2, so keep one per indexed text
+        matcher = difflib.SequenceMatcher(None)
+        matcher.set_seq2(text)
+        position = len(self.matchers)
+        self.matchers.append(matcher)
+
+        signature = self._signature(text)
+        if signature is None:
+            self.unsketched.append(position)
+            return
+        for key in self._band_keys(signature):
+            self.buckets.setdefault(key, []).append(position)
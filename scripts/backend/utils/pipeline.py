@@ -0,0 +1,69 @@
+import queue
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+def iter_in_background(iterable, max_buffered=8):
+    """Consume an iterable on a helper thread and yield its items.
+
+    The producer (e.g. a scraper sleeping between pages) keeps running while the
+    caller processes earlier items. Exceptions raised by the producer are re-raised
+    in the caller.
+    """
+    items = queue.Queue(maxsize=max_buffered)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in iterable:
+                if stop.is_set():
+                    break
+                items.put(item)
+        except Exception as e:
+            items.put(e)
+            return
+        items.put(_DONE)
+
+    producer = threading.Thread(target=produce, name='pipeline-producer', daemon=True)
+    producer.start()
+
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Let a producer blocked on a full queue finish if the consumer stops early
+        stop.set()
+        while producer.is_alive():
+            try:
+                items.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+def collect_scraped_items(items, url=None):
+    """Collect the items yielded by a scraper's iter_product into a scrape_product result"""
+    product_data = None
+    reviews_data = []
+
+    for item in items:
+        if item['type'] == 'error':
+            return {'success': False, 'error': item['error']}
+        if item['type'] == 'product':
+            product_data = item['product']
+        elif item['type'] == 'reviews':
+            reviews_data.extend(item['reviews'])
+
+    return {
+        'success': True,
+        'product': product_data,
+        'reviews': reviews_data,
+        'total_reviews': len(reviews_data),
+        'scraped_url': url
+    }
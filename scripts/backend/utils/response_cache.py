@@ -0,0 +1,351 @@
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+import logging
+from collections import Counter, namedtuple
+from .config_loader import config_loader
+from .bot_challenge import is_bot_challenge
+from .universal_url_validator import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..')
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_ROOT, 'data', 'http_cache')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Seconds between index writes; changes in between are only kept in memory
+SAVE_INTERVAL = 5.0
+
+# A stored page: its body, the Content-Type it was served with, and whether the
+# download ran to the end (streamed pages are cut short once enough was read)
+CachedPage = namedtuple('CachedPage', 'body content_type complete')
+
+def parse_cache_control(value):
+    """Cache-Control directives as a dict of lower-cased name -> value (None for bare names)"""
+    directives = {}
+    for part in (value or '').split(','):
+        name, _, argument = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = argument.strip().strip('"') or None
+    return directives
+
+def freshness_lifetime(response_headers, ttl):
+    """Seconds a response may be reused without revalidation: ttl, capped by max-age"""
+    directives = parse_cache_control(response_headers.get('Cache-Control'))
+    if 'no-cache' in directives:
+        return 0
+    # This cache is shared by every analysis, so s-maxage wins over max-age
+    max_age = directives.get('s-maxage') or directives.get('max-age')
+    if max_age is not None and max_age.isdigit():
+        return min(ttl, int(max_age))
+    return ttl
+
+class ResponseCache:
+    def __init__(self, directory=None, ttl=None, max_bytes=None):
+        """Keep downloaded pages on disk so repeat analyses do not fetch them again.
+
+        Entries are keyed by canonical URL and point to gzip-compressed bodies named
+        after the SHA-256 of their content, so identical pages are stored once. A copy
+        younger than ttl seconds is served without touching the network; an older one
+        is revalidated with If-None-Match/If-Modified-Since when the site sent an ETag
+        or Last-Modified. Pages whose download was stopped early are kept as partial
+        entries, which only callers that stream the page themselves are given, and never
+        replace a complete copy. Cache-Control is honored: no-store and private answers
+        are not kept, and no-cache and max-age shorten the ttl. Pages that look like a
+        CAPTCHA or robot check are not kept either. Once the
+        compressed bodies pass max_bytes, the least recently used entries are evicted.
+        The index is written at most every SAVE_INTERVAL seconds and at exit.
+        directory, ttl and max_bytes default to the response_cache_dir,
+        response_cache_ttl and response_cache_max_bytes settings; a max_bytes of 0
+        turns the cache off.
+        """
+        settings = config_loader.get_settings()
+        if directory is None:
+            directory = settings.get('response_cache_dir')
+        if directory is None:
+            directory = DEFAULT_CACHE_DIR
+        elif not os.path.isabs(directory):
+            directory = os.path.join(PROJECT_ROOT, directory)
+
+        self.directory = directory
+        self.index_path = os.path.join(directory, 'index.json')
+        self.ttl = ttl if ttl is not None else settings.get('response_cache_ttl', 600)
+        self.max_bytes = max_bytes if max_bytes is not None else settings.get('response_cache_max_bytes', DEFAULT_MAX_BYTES)
+        self.enabled = self.max_bytes > 0
+
+        self.lock = threading.Lock()
+        # Held while writing the index, so the main lock is never held during disk writes
+        self.save_lock = threading.Lock()
+        self.dirty = False
+        self.last_save = time.monotonic()
+        self.counters = {'hits': 0, 'revalidated': 0, 'misses': 0, 'evictions': 0}
+        self.entries = self._load() if self.enabled else {}
+        # Bodies are shared between URLs with the same content, so sizes are kept per digest
+        self.references = Counter(entry['digest'] for entry in self.entries.values())
+        self.blob_sizes = {entry['digest']: entry['size'] for entry in self.entries.values()}
+        self.total_bytes = sum(self.blob_sizes.values())
+        if self.enabled:
+            self._sweep()
+            atexit.register(self.flush)
+
+    def _load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read the response cache index {self.index_path}: {e}")
+            return {}
+
+    def _sweep(self):
+        """Delete bodies the index does not know about, left behind by an exit before the last index write"""
+        objects_dir = os.path.join(self.directory, 'objects')
+        for root, _, files in os.walk(objects_dir):
+            for name in files:
+                digest = name.split('.', 1)[0]
+                if digest not in self.references or not name.endswith('.gz'):
+                    try:
+                        os.remove(os.path.join(root, name))
+                    except OSError:
+                        pass
+
+    def _mark_dirty(self):
+        """Note that the index changed (caller must hold the lock)"""
+        self.dirty = True
+
+    def _save_if_due(self):
+        """Write the index if it changed and the last write is SAVE_INTERVAL seconds old"""
+        if self.dirty and time.monotonic() - self.last_save >= SAVE_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """Write the index now if it changed, atomically"""
+        with self.save_lock:
+            with self.lock:
+                if not self.dirty:
+                    return
+                snapshot = {key: dict(entry) for key, entry in self.entries.items()}
+                self.dirty = False
+                self.last_save = time.monotonic()
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                temp_path = f"{self.index_path}.tmp"
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f)
+                os.replace(temp_path, self.index_path)
+            except OSError as e:
+                logger.warning(f"Could not save the response cache index {self.index_path}: {e}")
+
+    def _blob_path(self, digest):
+        return os.path.join(self.directory, 'objects', digest[:2], f"{digest}.gz")
+
+    def _read_blob(self, digest):
+        try:
+            with open(self._blob_path(digest), 'rb') as f:
+                return gzip.decompress(f.read())
+        except (OSError, EOFError, zlib.error) as e:
+            logger.warning(f"Dropping unreadable cached body {digest}: {e}")
+            return None
+
+    def _write_blob(self, digest, body):
+        """Store a compressed body unless one with the same content exists; returns its size on disk"""
+        path = self._blob_path(digest)
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            pass
+        data = gzip.compress(body, compresslevel=6)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        return len(data)
+
+    def _delete_blob(self, digest):
+        try:
+            os.remove(self._blob_path(digest))
+        except OSError:
+            pass
+
+    def _remove(self, key):
+        """Forget an entry and delete its body if no other entry uses it (caller must hold the lock)"""
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        self._mark_dirty()
+        digest = entry['digest']
+        self.references[digest] -= 1
+        if self.references[digest] <= 0:
+            del self.references[digest]
+            self.total_bytes -= self.blob_sizes.pop(digest, 0)
+            self._delete_blob(digest)
+
+    def _evict(self):
+        """Drop least recently used entries until the bodies fit in max_bytes (caller must hold the lock)"""
+        if self.total_bytes <= self.max_bytes:
+            return
+        for key in sorted(self.entries, key=lambda k: self.entries[k]['used_at']):
+            if self.total_bytes <= self.max_bytes:
+                break
+            self._remove(key)
+            self.counters['evictions'] += 1
+
+    def get(self, url, allow_partial=False):
+        """Look up url and return (page, headers).
+
+        page is the stored CachedPage when it is still fresh. Otherwise page is None
+        and headers holds the conditional request headers for revalidating a stale
+        copy (empty if there is none); pass them on with the request and hand the
+        answer to update(). Partial pages are only considered with allow_partial.
+        """
+        if not self.enabled:
+            return None, {}
+        key = canonicalize_url(url)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or (not allow_partial and not entry.get('complete', True)):
+                return None, {}
+            entry = dict(entry)
+
+        if time.time() - entry['stored_at'] < entry.get('fresh_for', self.ttl):
+            body = self._read_blob(entry['digest'])
+            with self.lock:
+                if body is None:
+                    self._remove(key)
+                else:
+                    self.counters['hits'] += 1
+                    if key in self.entries:
+                        self.entries[key]['used_at'] = time.time()
+                        self._mark_dirty()
+            self._save_if_due()
+            if body is None:
+                return None, {}
+            return CachedPage(body, entry.get('content_type'), entry.get('complete', True)), {}
+
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return None, headers
+
+    def revalidated(self, url, response_headers):
+        """Refresh the stored copy of url after a 304 and return it as a CachedPage.
+
+        Returns None if the copy has gone missing meanwhile; fetch again without
+        conditional headers then.
+        """
+        key = canonicalize_url(url)
+        with self.lock:
+            entry = self.entries.get(key)
+            entry = dict(entry) if entry else None
+        body = self._read_blob(entry['digest']) if entry else None
+
+        with self.lock:
+            if body is None:
+                self._remove(key)
+            else:
+                self.counters['revalidated'] += 1
+                stored = self.entries.get(key)
+                if stored is not None:
+                    stored['stored_at'] = stored['used_at'] = time.time()
+                    stored['etag'] = response_headers.get('ETag') or stored.get('etag')
+                    stored['last_modified'] = response_headers.get('Last-Modified') or stored.get('last_modified')
+                    if response_headers.get('Cache-Control'):
+                        stored['fresh_for'] = freshness_lifetime(response_headers, self.ttl)
+                    self._mark_dirty()
+        self._save_if_due()
+        if body is None:
+            return None
+        return CachedPage(body, entry.get('content_type'), entry.get('complete', True))
+
+    def store(self, url, status, response_headers, body, complete=True):
+        """Record a downloaded answer for url, keeping the body if it can be cached.
+
+        complete=False marks a body whose download was stopped early; it replaces
+        a stored partial copy but never a complete one.
+        """
+        if not self.enabled:
+            return
+        key = canonicalize_url(url)
+
+        directives = parse_cache_control(response_headers.get('Cache-Control'))
+        cacheable = status == 200 and 'no-store' not in directives and 'private' not in directives
+        fresh_for = freshness_lifetime(response_headers, self.ttl)
+        if fresh_for == 0 and not (response_headers.get('ETag') or response_headers.get('Last-Modified')):
+            # It would have to be fetched again every time anyway
+            cacheable = False
+        if cacheable and is_bot_challenge(body):
+            # Keep whatever real copy is stored; the challenge says nothing about the page
+            logger.info(f"Not caching {url}: it looks like a bot challenge")
+            with self.lock:
+                self.counters['misses'] += 1
+            return
+        if cacheable and not complete:
+            with self.lock:
+                existing = self.entries.get(key)
+                if existing is not None and existing.get('complete', True):
+                    self.counters['misses'] += 1
+                    return
+
+        digest = size = None
+        if cacheable:
+            digest = hashlib.sha256(body).hexdigest()
+            try:
+                size = self._write_blob(digest, body)
+            except OSError as e:
+                logger.warning(f"Could not cache the body of {url}: {e}")
+                cacheable = False
+
+        with self.lock:
+            self.counters['misses'] += 1
+            if cacheable and size <= self.max_bytes:
+                # Take the reference first so an unchanged page does not delete its own body
+                if self.references[digest] == 0:
+                    self.blob_sizes[digest] = size
+                    self.total_bytes += size
+                self.references[digest] += 1
+                self._remove(key)
+                now = time.time()
+                self.entries[key] = {
+                    'digest': digest,
+                    'size': size,
+                    'complete': complete,
+                    'content_type': response_headers.get('Content-Type'),
+                    'etag': response_headers.get('ETag'),
+                    'last_modified': response_headers.get('Last-Modified'),
+                    'fresh_for': fresh_for,
+                    'stored_at': now,
+                    'used_at': now
+                }
+                self._mark_dirty()
+                self._evict()
+            else:
+                self._remove(key)
+                if cacheable and self.references[digest] == 0:
+                    self._delete_blob(digest)
+        self._save_if_due()
+
+    def get_stats(self):
+        """Hit, revalidation, miss and eviction counts plus the stored entries and bytes"""
+        with self.lock:
+            lookups = self.counters['hits'] + self.counters['revalidated'] + self.counters['misses']
+            saved = self.counters['hits'] + self.counters['revalidated']
+            return dict(
+                self.counters,
+                enabled=self.enabled,
+                entries=len(self.entries),
+                partialEntries=sum(1 for entry in self.entries.values() if not entry.get('complete', True)),
+                bytes=self.total_bytes,
+                maxBytes=self.max_bytes,
+                hitRate=saved / lookups if lookups else 0.0
+            )
+
+# Global instance shared by all fetches
+response_cache = ResponseCache()
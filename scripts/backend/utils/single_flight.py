@@ -0,0 +1,136 @@
+import hashlib
+import os
+import socket
+import threading
+import time
+import uuid
+import logging
+from datetime import timedelta
+from sqlalchemy.exc import IntegrityError
+from database.models import db, AnalysisLease, utcnow
+
+logger = logging.getLogger(__name__)
+
+class _InFlightCall:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        # Progress events so far and the callbacks of every caller waiting on the call
+        self.lock = threading.Lock()
+        self.progress = []
+        self.listeners = []
+
+    def add_listener(self, progress_callback):
+        """Replay the progress reported so far to a caller that just joined, then keep it informed"""
+        with self.lock:
+            for stage, details in self.progress:
+                _notify(progress_callback, stage, details)
+            self.listeners.append(progress_callback)
+
+    def report(self, stage, details):
+        with self.lock:
+            self.progress.append((stage, details))
+            listeners = list(self.listeners)
+        for listener in listeners:
+            _notify(listener, stage, details)
+
+def _notify(progress_callback, stage, details):
+    try:
+        progress_callback(stage, details)
+    except Exception as e:
+        logger.warning(f"Progress callback failed for stage {stage}: {e}")
+
+class SingleFlight:
+    def __init__(self):
+        """Share the result of one in-flight call between all callers using the same key"""
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, func, *args, progress_callback=None, **kwargs):
+        """Run func once per key; concurrent callers wait for the leader and get its result.
+
+        func is called with a progress_callback that forwards its progress events to
+        every caller's progress_callback, including events reported before a caller joined.
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _InFlightCall()
+                self.calls[key] = call
+        if progress_callback:
+            call.add_listener(progress_callback)
+
+        if not is_leader:
+            logger.info(f"Joining in-flight call for key: {key}")
+            call.event.wait()
+            if call.error:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, progress_callback=call.report, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.event.set()
+
+class AnalysisLeaseManager:
+    def __init__(self, lease_ttl=600, wait_timeout=300, poll_interval=1.0):
+        """Coordinate analyses across worker processes with a lease row per product"""
+        self.lease_ttl = lease_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.owner_prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    def get_lease_key(self, canonical_url):
+        return hashlib.sha1(canonical_url.encode('utf-8')).hexdigest()
+
+    def acquire(self, lease_key):
+        """Try to take the lease; returns the owner id on success, None if another worker holds it"""
+        owner = f"{self.owner_prefix}:{uuid.uuid4().hex[:8]}"
+        now = utcnow()
+        expires_at = now + timedelta(seconds=self.lease_ttl)
+
+        try:
+            db.session.add(AnalysisLease(key=lease_key, owner=owner, expires_at=expires_at))
+            db.session.commit()
+            return owner
+        except IntegrityError:
+            db.session.rollback()
+
+        # Take over a lease left behind by a crashed or stuck worker
+        updated = AnalysisLease.query.filter(
+            AnalysisLease.key == lease_key,
+            AnalysisLease.expires_at < now
+        ).update({'owner': owner, 'expires_at': expires_at}, synchronize_session=False)
+        db.session.commit()
+
+        return owner if updated == 1 else None
+
+    def release(self, lease_key, owner):
+        try:
+            AnalysisLease.query.filter_by(key=lease_key, owner=owner).delete(synchronize_session=False)
+            db.session.commit()
+        except Exception as e:
+            logger.error(f"Error releasing analysis lease {lease_key}: {str(e)}")
+            db.session.rollback()
+
+    def wait_for_release(self, lease_key):
+        """Poll until the lease is released or expires; returns False on timeout"""
+        deadline = time.time() + self.wait_timeout
+        while time.time() < deadline:
+            expires_at = db.session.query(AnalysisLease.expires_at).filter_by(key=lease_key).scalar()
+            db.session.commit()  # end the read transaction so the next poll sees new commits
+
+            if expires_at is None or expires_at < utcnow():
+                return True
+
+            time.sleep(self.poll_interval)
+
+        return False
@@ -1,8 +1,30 @@
 import re
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
 import requests
 from .config_loader import config_loader
 
+def canonicalize_url(url):
+    """Normalize a URL so that equivalent product links share one key"""
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+
+    parsed_url = urlparse(url.strip())
+    scheme = parsed_url.scheme.lower()
+    netloc = parsed_url.netloc.lower()
+
+    # Drop default ports
+    if (scheme == 'http' and netloc.endswith(':80')) or (scheme == 'https' and netloc.endswith(':443')):
+        netloc = netloc.rsplit(':', 1)[0]
+
+    path = parsed_url.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    # Sort query parameters and drop the fragment
+    query = urlencode(sorted(parse_qsl(parsed_url.query, keep_blank_values=True)))
+
+    return urlunparse((scheme, netloc, path, '', query, ''))
+
 class UniversalURLValidator:
     def __init__(self):
         # Load configuration
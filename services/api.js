@@ -43,10 +43,11 @@ api.interceptors.response.use(
   },
 )
 
-export const analyzeProductReviews = async (productUrl) => {
+export const analyzeProductReviews = async (productUrl, forceRefresh = false) => {
   try {
     const response = await api.post("/analyze", {
       url: productUrl,
+      force_refresh: forceRefresh,
     })
 
     return response.data
@@ -55,9 +56,100 @@ export const analyzeProductReviews = async (productUrl) => {
   }
 }
 
-export const getAnalysisHistory = async () => {
+// Streams analysis progress events; onEvent(event, data) is called for each one.
+// Resolves with the final result, or rejects with the server's error.
+// Aborting `signal` closes the stream (the promise then rejects with an AbortError).
+export const streamProductAnalysis = async (productUrl, onEvent, forceRefresh = false, signal) => {
+  const response = await fetch(`${API_BASE_URL}/analyze/stream`, {
+    method: "POST",
+    signal,
+    headers: {
+      "Content-Type": "application/json",
+      Accept: "text/event-stream",
+    },
+    body: JSON.stringify({ url: productUrl, force_refresh: forceRefresh }),
+  })
+
+  if (!response.ok) {
+    const data = await response.json().catch(() => ({}))
+    if (response.status === 429) {
+      throw new Error("Too many requests. Please wait a moment and try again.")
+    }
+    throw new Error(data.error || "Network error occurred")
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ""
+
+  while (true) {
+    const { value, done } = await reader.read()
+    if (done) break
+
+    buffer += decoder.decode(value, { stream: true })
+    const messages = buffer.split("\n\n")
+    buffer = messages.pop()
+
+    for (const message of messages) {
+      let event = "message"
+      let data = ""
+      for (const line of message.split("\n")) {
+        if (line.startsWith("event: ")) event = line.slice(7)
+        else if (line.startsWith("data: ")) data += line.slice(6)
+      }
+      if (!data) continue
+
+      const payload = JSON.parse(data)
+      if (event === "complete") return payload
+      if (event === "error") throw new Error(payload.error || "Failed to analyze reviews")
+      if (onEvent) onEvent(event, payload)
+    }
+  }
+
+  throw new Error("Analysis stream ended unexpectedly")
+}
+
+export const startAnalysisJob = async (productUrl) => {
+  try {
+    const response = await api.post("/analyze", {
+      url: productUrl,
+      async: true,
+    })
+
+    return response.data
+  } catch (error) {
+    throw error
+  }
+}
+
+export const getAnalysisJob = async (jobId) => {
+  try {
+    const response = await api.get(`/jobs/${jobId}`)
+    return response.data
+  } catch (error) {
+    throw error
+  }
+}
+
+export const analyzeProductBatch = async (productUrls, forceRefresh = false) => {
   try {
-    const response = await api.get("/history")
+    const response = await api.post("/analyze/batch", {
+      urls: productUrls,
+      force_refresh: forceRefresh,
+    })
+
+    return response.data
+  } catch (error) {
+    throw error
+  }
+}
+
+// Pass the previous response's nextCursor as `before` to load the next page
+export const getAnalysisHistory = async ({ before, platform, limit } = {}) => {
+  try {
+    const response = await api.get("/history", {
+      params: { before, platform, limit },
+    })
     return response.data
   } catch (error) {
     throw error